@@ -0,0 +1,7 @@
+"""
+Throughput benchmarks for the processors.
+
+    python -m benchmarks.generate 1k 10k 100k          # synthetic workbooks -> benchmarks/data/
+    python -m benchmarks.run 1k 10k -o baseline.json   # time every stage of every processor
+    python -m benchmarks.run 1k 10k --compare baseline.json
+"""
@@ -0,0 +1,289 @@
+"""
+Differential check of the calendar's fast paths against a row-by-row reference.
+
+    python -m benchmarks.check                # 3k generated rows plus edge cases
+    python -m benchmarks.check --rows 20000 --seed 7
+
+The reference is the original calendar: pd.read_excel, then iterrows() with
+one pd.to_datetime per cell for the title, date, day and sort key. It runs
+on two sheets, one of text descriptions and one of numbers. Every other
+path must give the same page byte for byte: generate_full_html, the
+incremental fragments (cold and warm), and the bounded-memory spill at
+several limits (plain, lazy and search pages, against the in-memory build).
+Exits 1 on any difference, printing the first line that differs.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+from collections import defaultdict
+from datetime import datetime
+
+import pandas as pd
+from openpyxl import Workbook
+
+from benchmarks.generate import event_row
+from processors import script_calendar as calendar
+from utils.render_cache import RenderCache
+
+# Rows the generator makes rarely or never: text dates, bad EndDates, blank
+# rows, ranges across months and years, times of day, numbers as text
+EDGE_ROWS = [
+    [datetime(2021, 1, 30), datetime(2021, 2, 2), None, "crosses a month"],
+    [datetime(2021, 12, 30), datetime(2022, 1, 3), None, "crosses a year"],
+    [datetime(2021, 3, 5, 18, 30), datetime(2021, 3, 5, 9), None, "same day, end before start by the clock"],
+    [datetime(2021, 3, 5), "ongoing", None, "EndDate is text"],
+    [datetime(2021, 3, 5), "2021-03-07", None, "EndDate is a date as text"],
+    [datetime(2021, 3, 5), 12, None, "EndDate is a number"],
+    ["2021-03-09", None, None, "StartDate is a date as text"],
+    ["TBD", datetime(2021, 3, 5), None, "StartDate is free text"],
+    ["Spring", None, None, "another free-text group"],
+    ["TBD", None, None, "free-text group seen again"],
+    [None, None, None, None],
+    [None, None, None, None],
+    [None, datetime(2021, 3, 5), None, "EndDate without a StartDate"],
+    [datetime(2021, 3, 5), None, None, 42],
+    [datetime(2021, 3, 5), None, None, 2.5],
+    [datetime(2021, 3, 5), None, None, "<b>markup</b> & ampersand"],
+    [datetime(2021, 3, 5), datetime(2021, 4, 20), None, "too long for a day range"],
+    [datetime(2021, 3, 5), None, None, None],
+]
+
+# A sheet of real dates only, whose Description column holds only numbers and
+# blanks: pandas types that column float ("3.0"), and iterrows() types a row
+# of dates and a blank as dates
+NUMBER_EDGE_ROWS = [
+    [datetime(2021, 3, 5), None, None, None],
+    [datetime(2021, 3, 5), datetime(2021, 3, 7), None, None],
+    [datetime(2021, 3, 5), None, None, 3],
+    [datetime(2021, 3, 5), None, None, 2.5],
+    [datetime(2021, 3, 5), None, None, 10 ** 17],
+    [None, None, None, 7],
+    [None, None, None, None],
+]
+
+
+def number_row(rng, i):
+    row = event_row(rng, i)
+    if isinstance(row[0], str):
+        row[0] = None
+    row[3] = None if row[3] is None else rng.randrange(1000)
+    return row
+
+
+def write_workbook(rows, path, seed=0, numbers=False):
+    """
+    An Events sheet of `rows` generated rows with EDGE_ROWS spread through
+    it; with `numbers`, number_row() rows and NUMBER_EDGE_ROWS.
+    """
+    rng = random.Random(seed)
+    events = [(number_row if numbers else event_row)(rng, i) for i in range(rows)]
+    for edge in NUMBER_EDGE_ROWS if numbers else EDGE_ROWS:
+        events.insert(rng.randrange(len(events) + 1), edge)
+
+    wb = Workbook(write_only=True)
+    sheet = wb.create_sheet("Events")
+    sheet.append(["StartDate", "EndDate", "Title", "Description"])
+    for row in events:
+        sheet.append(row)
+    wb.save(path)
+    return path
+
+
+# ---------------------------------------------------------
+# Reference: the original calendar (the baseline's
+# script_calendar.py), row by row over iterrows()
+# ---------------------------------------------------------
+def _date_or_range(start, end):
+    if pd.isnull(start):
+        return ""
+    start_dt = pd.to_datetime(start, errors="coerce").normalize()
+    if pd.isnull(end):
+        return f"{start_dt.strftime('%B')} {start_dt.day}"
+    end_dt = pd.to_datetime(end, errors="coerce").normalize()
+    num_days = (end_dt - start_dt).days
+    if num_days < 1:
+        return f"{start_dt.strftime('%B')} {start_dt.day}"
+    if start_dt.month == end_dt.month and start_dt.year == end_dt.year:
+        return f"{start_dt.strftime('%b')} {start_dt.day}-{end_dt.day}"
+    return f"{start_dt.strftime('%b')} {start_dt.day}-{end_dt.strftime('%b')} {end_dt.day}"
+
+
+def _day_or_range(start, end):
+    if pd.isnull(start):
+        return ""
+    try:
+        start_dt = pd.to_datetime(start).normalize()
+        if pd.isnull(end):
+            return start_dt.strftime("%A")
+        end_dt = pd.to_datetime(end).normalize()
+        num_days = (end_dt - start_dt).days
+        if num_days > 7 or num_days < 0:
+            return ""
+        return f"{start_dt.strftime('%a')}-{end_dt.strftime('%a')}"
+    except Exception:
+        pass
+    return str(start)
+
+
+def _sort_key(row):
+    start_dt = pd.to_datetime(row[0], errors="coerce")
+    end_dt = pd.to_datetime(row[1], errors="coerce")
+    if pd.isna(start_dt):
+        return (pd.Timestamp.max, 999999)
+    return (start_dt, 0 if pd.isna(end_dt) else (end_dt - start_dt).days)
+
+
+def _title_order(title):
+    try:
+        return pd.to_datetime(title, format="%B %Y")
+    except (ValueError, TypeError):
+        return pd.Timestamp.max
+
+
+def _table(rows):
+    html = ["""
+        <table class="event-table">
+            <thead>
+                <tr>
+                    <th class="col-date">Date</th>
+                    <th class="col-day">Day</th>
+                    <th class="col-desc">Description</th>
+                </tr>
+            </thead>
+            <tbody>
+    """]
+    for i, (_, _, date, day, desc) in enumerate(rows):
+        row_class = "even-row" if i % 2 == 0 else "odd-row"
+        html.append(f"""
+                <tr class="{row_class}">
+                    <td class="col-date">{date}</td>
+                    <td class="col-day">{day}</td>
+                    <td class="col-desc">{desc}</td>
+                </tr>
+        """)
+    html.append("""
+            </tbody>
+        </table>
+    """)
+    return "\n".join(html)
+
+
+def _accordion_item(title, table_html, index, accordion_id):
+    collapse_id = f"collapse{index}"
+    heading_id = f"heading{index}"
+    return f"""
+        <div class="accordion-item custom-accordion-item">
+            <h2 class="accordion-header" id="{heading_id}">
+                <button class="accordion-button custom-accordion-header collapsed"
+                        type="button"
+                        data-bs-toggle="collapse"
+                        data-bs-target="#{collapse_id}"
+                        aria-expanded="false"
+                        aria-controls="{collapse_id}">
+                    {title}
+                </button>
+            </h2>
+
+            <div id="{collapse_id}"
+                 class="accordion-collapse collapse"
+                 aria-labelledby="{heading_id}"
+                 data-bs-parent="#{accordion_id}">
+                <div class="accordion-body custom-accordion-body">
+                    {table_html}
+                </div>
+            </div>
+        </div>
+    """
+
+
+def reference_html(path):
+    df = pd.read_excel(path, sheet_name="Events")
+    groups = defaultdict(list)
+    for _, row in df.iterrows():
+        raw_date = row["StartDate"]
+        raw_end_date = row["EndDate"]
+        if pd.notnull(raw_date):
+            try:
+                title = pd.to_datetime(raw_date).strftime("%B %Y")
+            except Exception:
+                title = str(raw_date)
+            try:
+                date = _date_or_range(raw_date, raw_end_date)
+            except Exception:
+                date = str(raw_date)
+            try:
+                day = _day_or_range(raw_date, raw_end_date)
+            except Exception:
+                day = ""
+        else:
+            title, date, day = "Untitled", "", ""
+
+        desc = str(row["Description"])
+        if desc == "NaT" and pd.isna(row["Description"]):
+            # The one intended change (user-002): iterrows() typed a row of dates and
+            # blanks as dates, so a blank Description showed "NaT"; it now shows as
+            # every other blank does
+            desc = calendar.BLANK_DESCRIPTION
+        groups[title].append((raw_date, raw_end_date, date, day, desc))
+
+    accordion_id = "accordionMaster"
+    items = []
+    for idx, (title, rows) in enumerate(sorted(groups.items(), key=lambda item: _title_order(item[0])), start=1):
+        items.append(_accordion_item(title, _table(sorted(rows, key=_sort_key)), idx, accordion_id))
+    return calendar.document_head(accordion_id) + "".join(items) + calendar.DOCUMENT_TAIL
+
+
+# ---------------------------------------------------------
+# Comparisons
+# ---------------------------------------------------------
+def first_difference(expected, actual):
+    expected_lines, actual_lines = expected.splitlines(), actual.splitlines()
+    for number, (want, got) in enumerate(zip(expected_lines, actual_lines), start=1):
+        if want != got:
+            return f"line {number}: expected {want.strip()[:120]!r}, got {got.strip()[:120]!r}"
+    return f"expected {len(expected_lines)} lines, got {len(actual_lines)}"
+
+
+def checks(path, scratch):
+    """Yield (name, expected, actual) for every path that must match."""
+    reference = reference_html(path)
+    yield "generate_full_html", reference, calendar.generate_full_html(path)
+    yield "render", reference, calendar.render(path, memory_limit=0)
+
+    fragments = RenderCache(os.path.join(scratch, "fragments"))
+    for label in ("cold", "warm"):
+        yield f"fragments ({label})", reference, calendar.render(path, fragments=fragments, memory_limit=0)
+
+    # Small limits make many pieces, so groups span several run files
+    limits = [calendar.RUN_BATCH * calendar.ROW_BYTES, 4 * calendar.RUN_BATCH * calendar.ROW_BYTES]
+    for lazy, search in [(False, False), (True, False), (False, True), (True, True)]:
+        in_memory = calendar.render(path, lazy=lazy, search=search, memory_limit=0)
+        for limit in limits:
+            name = f"spill {limit // 1024} KB" + (" lazy" if lazy else "") + (" search" if search else "")
+            yield name, in_memory, calendar.render(path, lazy=lazy, search=search, memory_limit=limit)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the calendar's fast paths against the row-by-row reference.")
+    parser.add_argument("--rows", type=int, default=3000, help="generated rows besides the edge cases (default: 3000)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    failed = 0
+    for label, numbers in (("text", False), ("numbers", True)):
+        with tempfile.TemporaryDirectory() as scratch:
+            path = write_workbook(args.rows, os.path.join(scratch, "check.xlsx"), seed=args.seed, numbers=numbers)
+            for name, expected, actual in checks(path, scratch):
+                if expected == actual:
+                    print(f"OK   {label}: {name}")
+                else:
+                    failed += 1
+                    print(f"FAIL {label}: {name}: {first_difference(expected, actual)}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
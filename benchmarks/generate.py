@@ -0,0 +1,110 @@
+"""
+Synthetic workbooks shaped like the real chapter files: an Events sheet
+with messy dates, plus Presidents and Officers sheets.
+"""
+import argparse
+import os
+import random
+from datetime import datetime, timedelta
+
+from openpyxl import Workbook
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+
+SIZES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+WORDS = ("meeting luncheon picnic board social tea bazaar service project "
+         "memorial installation officers chapter district convention auction").split()
+OFFICES = ["President ", "1st Vice President ", "2nd Vice President ", "Chaplain",
+           "Historian", "Financial Secretary", "Corresponding Secretary", "Recording Secretary"]
+
+
+def parse_size(value):
+    """'10k' / '1M' / '2500' -> row count."""
+    value = str(value).strip().lower()
+    if value in SIZES:
+        return SIZES[value]
+    if value.endswith("k"):
+        return int(float(value[:-1]) * 1_000)
+    if value.endswith("m"):
+        return int(float(value[:-1]) * 1_000_000)
+    return int(value)
+
+
+def size_label(rows):
+    for label, count in SIZES.items():
+        if count == rows:
+            return label
+    return str(rows)
+
+
+def event_row(rng, i):
+    start = datetime(1990, 1, 1) + timedelta(days=rng.randrange(40 * 365))
+    if rng.random() < 0.2:
+        start += timedelta(hours=rng.choice([9, 13, 18]))
+
+    kind = rng.random()
+    if kind < 0.55:
+        end = None                                                  # single day, blank EndDate
+    elif kind < 0.80:
+        end = start + timedelta(days=rng.randint(1, 3))             # short range, often same month
+    elif kind < 0.90:
+        end = start.replace(day=1) + timedelta(days=rng.randint(31, 40))   # crosses a month
+    elif kind < 0.93:
+        end = start - timedelta(days=rng.randint(1, 5))             # backwards range
+    elif kind < 0.96:
+        end = start + timedelta(days=rng.randint(8, 30))            # too long for a day range
+    elif kind < 0.98:
+        start, end = rng.choice(["TBD", "Spring", start.strftime("%Y-%m-%d")]), None   # text dates
+    else:
+        start, end = None, None                                     # no date at all
+
+    title = f"{rng.choice(WORDS).title()} {i}" if rng.random() < 0.9 else None
+    desc = " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 25)))
+    if rng.random() < 0.03:
+        desc = None
+    return [start, end, title, desc]
+
+
+def generate(rows, path=None, seed=0):
+    """Write a workbook with `rows` rows in each sheet; returns its path."""
+    path = path or os.path.join(DATA_DIR, f"events_{size_label(rows)}.xlsx")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    rng = random.Random(seed)
+
+    # write_only streams rows to disk, so 1M-row sheets don't need 1M cells in memory
+    wb = Workbook(write_only=True)
+
+    events = wb.create_sheet("Events")
+    events.append(["StartDate", "EndDate", "Title", "Description"])
+    for i in range(rows):
+        events.append(event_row(rng, i))
+
+    presidents = wb.create_sheet("Presidents")
+    presidents.append(["Year", "Name"])
+    for i in range(rows):
+        year = 1900 + i % 200
+        presidents.append([year if rng.random() < 0.8 else f"{year}-{(year + 1) % 100:02d}",
+                           f"Member {i}" if rng.random() < 0.97 else None])
+
+    officers = wb.create_sheet("Officers")
+    officers.append(["Name", "Office"])
+    for i in range(rows):
+        officers.append([f"Officer {i}" if rng.random() < 0.95 else None, rng.choice(OFFICES)])
+
+    wb.save(path)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic benchmark workbooks.")
+    parser.add_argument("sizes", nargs="*", default=["1k", "10k"], help="row counts: 1k 10k 100k 1m or a number")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    for size in args.sizes:
+        print(generate(parse_size(size), seed=args.seed))
+
+
+if __name__ == "__main__":
+    main()
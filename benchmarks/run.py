@@ -0,0 +1,144 @@
+"""
+Time every stage of every processor on the synthetic workbooks.
+
+Each processor's render() reports its stages (read, transform, render)
+to a utils.instrument.StageRecorder; the harness adds the write stage by
+saving the HTML to a scratch file. Timings come from untraced runs (best of
+--repeat); peak memory comes from one extra run under tracemalloc.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.generate import DATA_DIR, generate, parse_size, size_label
+from processors.registry import SCRIPTS
+from utils.instrument import StageRecorder
+from utils.jobs import STAGES
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_once(info, data, out_dir, trace_memory=False):
+    """One render + write. Returns the StageRecorder's per-stage record."""
+    recorder = StageRecorder(info["slug"], trace_memory=trace_memory)
+
+    html = info["render"](data, progress=recorder)
+
+    recorder("write")
+    with open(os.path.join(out_dir, info["slug"] + ".html"), "w", encoding="utf-8") as f:
+        f.write(html)
+
+    return recorder.finish()["stages"]
+
+
+def bench_processor(info, data, rows, repeat, out_dir):
+    best = None
+    for _ in range(repeat):
+        stages = run_once(info, data, out_dir)
+        total = sum(s["seconds"] for s in stages.values())
+        if best is None or total < best[0]:
+            best = (total, stages)
+    total, stages = best
+
+    memory = run_once(info, data, out_dir, trace_memory=True)
+    for stage, values in stages.items():
+        values["peak_mb"] = memory[stage]["peak_mb"]
+
+    return {
+        "rows": rows,
+        "seconds": round(total, 4),
+        "rows_per_s": round(rows / total) if total else None,
+        "peak_mb": max(v["peak_mb"] for v in stages.values()),
+        "stages": {stage: stages[stage] for stage in STAGES if stage in stages},
+    }
+
+
+def run_benchmarks(sizes, names, repeat=3):
+    results = {}
+    with tempfile.TemporaryDirectory() as out_dir:
+        for rows in sizes:
+            label = size_label(rows)
+            path = os.path.join(DATA_DIR, f"events_{label}.xlsx")
+            if not os.path.exists(path):
+                print(f"generating {path} ...", file=sys.stderr)
+                generate(rows, path)
+            with open(path, "rb") as f:
+                data = f.read()
+
+            results[label] = {}
+            for name in names:
+                info = SCRIPTS[name]
+                result = bench_processor(info, data, rows, repeat, out_dir)
+                results[label][info["slug"]] = result
+                print(f"{label:>5} {info['slug']:<11} {result['seconds']:>9.3f}s "
+                      f"{result['rows_per_s']:>10,} rows/s {result['peak_mb']:>8.1f} MB peak")
+    return {
+        "commit": git_commit(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold):
+    """Print the change against a baseline; returns the list of regressions."""
+    regressions = []
+    print(f"\nvs baseline {baseline.get('commit') or '?'} ({baseline.get('created', '?')}):")
+    for label, processors in current["results"].items():
+        for slug, result in processors.items():
+            old = baseline.get("results", {}).get(label, {}).get(slug)
+            if not old or not old.get("rows_per_s"):
+                continue
+            change = result["rows_per_s"] / old["rows_per_s"] - 1
+            flag = ""
+            if change < -threshold:
+                flag = "  REGRESSION"
+                regressions.append((label, slug, change))
+            print(f"{label:>5} {slug:<11} {old['rows_per_s']:>10,} -> {result['rows_per_s']:>10,} rows/s "
+                  f"({change:+.1%}){flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark every processor stage by stage.")
+    parser.add_argument("sizes", nargs="*", default=["1k", "10k"], help="row counts: 1k 10k 100k 1m or a number")
+    parser.add_argument("-s", "--script", action="append", dest="scripts", help="processor slug (default: all)")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="timed runs per processor; best is kept")
+    parser.add_argument("-o", "--output", help="write results JSON here (e.g. a new baseline)")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare against a baseline JSON")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="throughput drop that counts as a regression (default: 0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    slugs = {info["slug"]: name for name, info in SCRIPTS.items()}
+    names = [slugs[s] for s in args.scripts] if args.scripts else list(SCRIPTS)
+
+    current = run_benchmarks([parse_size(s) for s in args.sizes], names, args.repeat)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+        print(f"\nresults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(current, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
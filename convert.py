@@ -0,0 +1,173 @@
+"""
+Headless batch converter: the same processors as the Streamlit app, from the command line.
+
+    python convert.py chapters/ extra/*.xlsx -o site/ -s calendar -s presidents
+
+Inputs can be files, directories (every .xlsx inside, recursively) or glob
+patterns. Workbooks are converted in parallel, one per worker process.
+Outputs have fixed names (Book_calendar.html), so running again into the
+same directory replaces them; _1, _2, ... is only added when two inputs
+share a file name.
+Exit code is 0 when everything converted, 1 when any workbook or processor
+failed, 2 when no input workbooks were found.
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from functools import partial
+
+
+def find_workbooks(inputs):
+    """Expand files, directories and globs into a sorted, de-duplicated list of .xlsx paths."""
+    found = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            matches = glob.glob(os.path.join(item, "**", "*.xlsx"), recursive=True)
+        elif os.path.isfile(item):
+            matches = [item]
+        else:
+            matches = glob.glob(item, recursive=True)
+
+        for path in matches:
+            # Skip Excel's "~$Book.xlsx" lock files
+            if path.lower().endswith(".xlsx") and not os.path.basename(path).startswith("~$"):
+                found.add(os.path.abspath(path))
+    return sorted(found)
+
+
+def resolve_scripts(choices, scripts):
+    """Map --script values (display name or slug, any case) to SCRIPTS names."""
+    if not choices:
+        return list(scripts)
+
+    by_alias = {}
+    for name, info in scripts.items():
+        by_alias[name.lower()] = name
+        by_alias[info["slug"]] = name
+
+    names = []
+    for choice in choices:
+        name = by_alias.get(choice.lower())
+        if name is None:
+            raise ValueError(f"Unknown script '{choice}'. Choose from: {', '.join(s['slug'] for s in scripts.values())}")
+        if name not in names:
+            names.append(name)
+    return names
+
+
+def source_names(workbooks):
+    """
+    {path: name its outputs are named after}: the file name, with _1, _2, ...
+    added when workbooks from different folders share one.
+    """
+    from utils.file_io import unique_name
+
+    taken = set()
+    return {path: unique_name(os.path.basename(path), taken) for path in workbooks}
+
+
+def convert_workbook(path, source_name, names, output_dir, lazy=False, search=False, optimize=False, exports=()):
+    """
+    Worker: convert one workbook with every selected processor, writing
+    its outputs under `output_dir` as <source_name stem>_<slug>.html (and
+    siblings). An output from an earlier run is replaced in one step.
+    Returns (path, written, errors, reports); `reports` are size reports
+    per output when `optimize` is on.
+    """
+    from processors.batch import convert_source
+    from utils.file_io import write_atomic
+    from utils.optimize import size_report
+
+    converted = convert_source(path, source_name, names, lazy=lazy, search=search, optimize=optimize,
+                               exports=exports)
+
+    written = []
+    reports = {}
+    for output in converted["outputs"]:
+        for file_name, content in output["files"].items():
+            target = os.path.join(output_dir, file_name)
+            write_atomic(target, content)
+            written.append(target)
+        if output["sizes"]:
+            reports[output["file_name"]] = size_report(output["sizes"])
+
+    return path, written, converted["errors"], reports
+
+
+def main(argv=None):
+    from processors.records import EXPORTERS
+
+    parser = argparse.ArgumentParser(description="Convert Excel workbooks to HTML with the PioneerHTML processors.")
+    parser.add_argument("inputs", nargs="+", help="workbook files, directories or glob patterns")
+    parser.add_argument("-o", "--output-dir", default="output", help="where to write the HTML (default: output/)")
+    parser.add_argument("-s", "--script", action="append", dest="scripts",
+                        help="processor to run, by name or slug (repeatable; default: all)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="worker processes (default: one per core)")
+    parser.add_argument("--lazy", action="store_true",
+                        help="accordion outputs load each body on first expand (for very large pages)")
+    parser.add_argument("--search", action="store_true",
+                        help="accordion outputs get a search box over an index embedded in the page")
+    parser.add_argument("--optimize", action="store_true",
+                        help="minify the HTML and write .gz/.br precompressed siblings next to it")
+    parser.add_argument("--export", action="append", dest="exports", default=[], choices=sorted(EXPORTERS),
+                        help="also write this format from the same parsed rows, where the processor offers it "
+                             "(repeatable)")
+    parser.add_argument("--log-json", action="store_true",
+                        help="log per-stage timing/memory records as JSON lines on stderr")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="record tracemalloc peaks per stage (slower)")
+    args = parser.parse_args(argv)
+
+    from processors.registry import SCRIPTS
+
+    try:
+        names = resolve_scripts(args.scripts, SCRIPTS)
+    except ValueError as e:
+        parser.error(str(e))
+
+    workbooks = find_workbooks(args.inputs)
+    if not workbooks:
+        print("No .xlsx workbooks found.", file=sys.stderr)
+        return 2
+
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    started = time.time()
+    outputs = 0
+    failed = 0
+
+    from processors.batch import iter_pool
+
+    convert = partial(convert_workbook, names=names, output_dir=args.output_dir,
+                      lazy=args.lazy, search=args.search, optimize=args.optimize, exports=args.exports)
+    calls = list(source_names(workbooks).items())
+    for (path, _), result, error in iter_pool(convert, calls, names, jobs=args.jobs,
+                                            log_json=args.log_json, trace_memory=args.trace_memory):
+        if error is None:
+            _, written, errors, reports = result
+        else:
+            written, errors, reports = [], {"workbook": f"{type(error).__name__}: {error}"}, {}
+
+        outputs += len(written)
+        if errors:
+            failed += 1
+            print(f"FAIL {path}")
+            for name, message in errors.items():
+                print(f"     {name}: {message}")
+        else:
+            print(f"OK   {path} -> {len(written)} file(s)")
+        for file_name, line in reports.items():
+            print(f"     {file_name}: {line}")
+
+    elapsed = time.time() - started
+    print(f"\n{len(workbooks) - failed}/{len(workbooks)} workbooks converted, "
+          f"{outputs} file(s) written to {args.output_dir} in {elapsed:.1f}s")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
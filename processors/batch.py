@@ -0,0 +1,96 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from .registry import SCRIPTS, run_all
+
+
+# ---------------------------------------------------------
+# Many workbooks: one worker process per workbook at a time
+# ---------------------------------------------------------
+def _init_worker(names, log_json=False, trace_memory=False):
+    # The selected processors (and pandas/openpyxl with them) load here, once per worker, not per file
+    for name in names:
+        SCRIPTS[name].load()
+
+    from utils import instrument
+    if log_json:
+        instrument.enable_json_logs()
+    if trace_memory:
+        instrument.TRACE_MEMORY = True
+
+
+def convert_source(source, source_name, names, lazy=False, search=False, optimize=False, exports=()):
+    """
+    Worker: run the selected processors on one workbook, in memory.
+
+    `source` is a path or the .xlsx bytes. Returns {"source": source_name,
+    "outputs": [...], "errors": {name: message}}. Each output is a dict with
+    "processor", "file_name", "files" ({file name: text or bytes}: the page,
+    plus its .gz/.br siblings with `optimize` and its `exports`) and "sizes"
+    (None unless `optimize`).
+    """
+    from utils.instrument import instrument
+    from utils.preflight import preflight
+
+    if not isinstance(source, (bytes, bytearray)):
+        with open(source, "rb") as f:
+            source = f.read()
+
+    # Header rows only: processors this workbook can't feed fail here, without a full read
+    errors = {}
+    for name, problems in preflight(source, SCRIPTS, names).items():
+        if problems:
+            errors[name] = "; ".join(problems)
+    runnable = [name for name in names if name not in errors]
+
+    results = {}
+    if runnable:
+        with instrument("run_all", source_name) as progress:
+            results, _ = run_all(source, source_name, runnable, progress=progress, lazy=lazy, search=search,
+                                 optimize=optimize, exports=exports)
+
+    outputs = []
+    for name, result in results.items():
+        if result["error"] is not None:
+            errors[name] = f"{type(result['error']).__name__}: {result['error']}"
+            continue
+        artifacts = result.get("artifacts")
+        files = dict(artifacts["files"]) if artifacts else {result["file_name"]: result["html"]}
+        files.update(result["exports"])
+        outputs.append({
+            "processor": name,
+            "file_name": result["file_name"],
+            "files": files,
+            "sizes": artifacts["sizes"] if artifacts else None,
+        })
+
+    return {"source": source_name, "outputs": outputs, "errors": errors}
+
+
+def iter_pool(func, calls, names, jobs=None, log_json=False, trace_memory=False, mp_context=None):
+    """
+    Run func(*args) for every args tuple in `calls` on a process pool and
+    yield (args, result, error) as each call finishes; one failing call
+    doesn't stop the rest. `func` must be picklable (a module-level
+    function or a functools.partial of one). Closing the generator early
+    drops the calls that haven't started.
+    """
+    calls = list(calls)
+    workers = max(1, min(jobs or os.cpu_count() or 1, len(calls)))
+
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=mp_context, initializer=_init_worker,
+                               initargs=(names, log_json, trace_memory))
+    try:
+        futures = {pool.submit(func, *args): args for args in calls}
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result(), None
+            except Exception as e:
+                yield futures[future], None, e
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def spawn_context():
+    # For callers inside a threaded server (the app): forking it could copy held locks
+    return multiprocessing.get_context("spawn")
@@ -0,0 +1,174 @@
+import csv
+import datetime
+import hashlib
+import html
+import io
+import json
+import re
+
+# ---------------------------------------------------------
+# Parsed rows: one small object per sheet row, filled once per
+# parse and shared by every output (the HTML page and the
+# exports below). __slots__ keeps a 100k-row sheet compact.
+# A blank cell is None; what it shows as on a page is up to
+# that page.
+# ---------------------------------------------------------
+class Record:
+    __slots__ = ()
+
+    def __init__(self, *values):
+        # Fields left out are blank
+        values += (None,) * (len(self.__slots__) - len(values))
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+    def __eq__(self, other):
+        return type(self) is type(other) and all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+
+class Event(Record):
+    """
+    One row of the Events sheet. `start`/`end` are dates (None when blank
+    or not a date); `date`/`day` are the calendar's display text for them.
+    """
+    __slots__ = ("title", "description", "start", "end", "date", "day")
+
+
+class President(Record):
+    __slots__ = ("year", "name")
+
+
+class Officer(Record):
+    __slots__ = ("name", "office")
+
+
+def _cell(value):
+    # A blank cell in a number column turns the whole column float; Excel numbers are whole as often as not
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def values(col):
+    """A column's cells as a list: None where blank, whole floats as int."""
+    return [_cell(v) for v in col.astype(object).where(col.notna(), None)]
+
+
+def text(value):
+    """A cell as text, None when blank."""
+    # NaN and NaT are the only values not equal to themselves
+    return None if value is None or value != value else str(value)
+
+
+def from_columns(record_class, *columns):
+    """Records from parallel columns (lists or Series), one per row."""
+    return [record_class(*values) for values in zip(*columns)]
+
+
+# ---------------------------------------------------------
+# Exports: each takes a list of records and returns the file's text
+# ---------------------------------------------------------
+def _plain(value):
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return value
+
+
+def to_json(records):
+    """A JSON array with one object per record; dates as ISO strings."""
+    rows = [{name: _plain(getattr(r, name)) for name in r.__slots__} for r in records]
+    return json.dumps(rows, ensure_ascii=False, default=str)
+
+
+def to_csv(records):
+    """CSV with a header of the record's field names; blanks are empty."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    if records:
+        writer.writerow(records[0].__slots__)
+    for r in records:
+        writer.writerow(["" if getattr(r, name) is None else _plain(getattr(r, name)) for name in r.__slots__])
+    return buffer.getvalue()
+
+
+_TAG = re.compile(r"<[^>]*>")
+
+
+def _ics_text(value):
+    # Calendar descriptions may hold markup; .ics text is plain
+    value = html.unescape(_TAG.sub("", str(value)))
+    value = value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+    return value.replace("\r\n", "\\n").replace("\n", "\\n")
+
+
+def _fold(line):
+    # RFC 5545: lines over 75 octets continue on the next line after a space
+    data = line.encode("utf-8")
+    if len(data) <= 75:
+        return line
+    parts = []
+    while len(data) > 75:
+        cut = 75 if not parts else 74
+        # Never split a UTF-8 sequence
+        while cut and (data[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(data[:cut].decode("utf-8"))
+        data = data[cut:]
+    parts.append(data.decode("utf-8"))
+    return "\r\n ".join(parts)
+
+
+def to_ics(events, stamp=None):
+    """
+    An iCalendar file with one all-day VEVENT per event that has a start
+    date; the summary is the title, or the description when there is none.
+    """
+    stamp = (stamp or datetime.datetime.now(datetime.timezone.utc)).strftime("%Y%m%dT%H%M%SZ")
+    lines = ["BEGIN:VCALENDAR", "VERSION:2.0", "PRODID:-//PioneerHTML//Calendar//EN", "CALSCALE:GREGORIAN"]
+    seen = {}
+
+    for event in events:
+        if event.start is None:
+            continue
+        end = event.end if event.end is not None and event.end > event.start else event.start
+        summary = next((v for v in (event.title, event.description) if v is not None), "Untitled")
+
+        # Same event, same UID, so a re-import updates rather than duplicates;
+        # identical rows are told apart by how many came before
+        key = f"{event.start}\0{end}\0{summary}"
+        seen[key] = seen.get(key, 0) + 1
+        uid = hashlib.sha1(f"{key}\0{seen[key]}".encode("utf-8")).hexdigest()
+
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:{uid}@pioneerhtml",
+            f"DTSTAMP:{stamp}",
+            f"DTSTART;VALUE=DATE:{event.start:%Y%m%d}",
+            # DTEND is exclusive: the day after the last day
+            f"DTEND;VALUE=DATE:{end + datetime.timedelta(days=1):%Y%m%d}",
+            f"SUMMARY:{_ics_text(summary)}",
+        ]
+        if event.title is not None and event.description is not None:
+            lines.append(f"DESCRIPTION:{_ics_text(event.description)}")
+        lines.append("END:VEVENT")
+
+    lines.append("END:VCALENDAR")
+    return "".join(_fold(line) + "\r\n" for line in lines)
+
+
+# Format -> exporter; a processor lists the ones its records suit in EXPORTS
+EXPORTERS = {
+    "json": to_json,
+    "csv": to_csv,
+    "ics": to_ics,
+}
+
+
+def export(records, formats):
+    """{format: text} for each of `formats`, all from the same records."""
+    return {fmt: EXPORTERS[fmt](records) for fmt in formats}
@@ -1,20 +1,259 @@
-from . import script_president, script_social, script_calendar, script_officers
+import importlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from importlib.metadata import entry_points
+from utils.file_io import build_archive
+from utils.optimize import optimize as optimize_html
+from utils.jobs import cancellable, report
+
+logger = logging.getLogger(__name__)
+
+# Third-party packages add processors under this entry point group
+ENTRY_POINT_GROUP = "pioneerhtml.processors"
+
+# What the registry needs to know without importing a processor
+REQUIRED_KEYS = ("module", "slug", "sheet", "columns")
+OPTIONAL_KEYS = {"needs_target": False, "lazy": False, "search": False, "defaults": {}}
+
+# Entry keys that come from the processor module, read on first use
+MODULE_ATTRS = {
+    "func": "run", # (input_path, original_name) -> output path
+    "render": "render", # (source) -> html, source = path/bytes/BytesIO
+    "render_frame": "render_frame",
+    "stream_frame": "iter_frame",
+    "emit_frame": "emit_frame", # (df, formats) -> {"html": page, format: text}
+    "exports": "EXPORTS", # formats besides HTML, see processors.records
+    "version": "VERSION",
+}
+
+# Module attributes a processor may leave out
+MODULE_DEFAULTS = {"exports": ()}
+
+
+class Processor(dict):
+    """
+    One SCRIPTS entry. The metadata (slug, sheet, columns, ...) is plain
+    dict data; asking for anything in MODULE_ATTRS imports the module the
+    first time, so listing processors never loads pandas.
+    """
+
+    def __missing__(self, key):
+        if key not in MODULE_ATTRS:
+            raise KeyError(key)
+        module = self.load()
+        if key in MODULE_DEFAULTS:
+            value = getattr(module, MODULE_ATTRS[key], MODULE_DEFAULTS[key])
+        else:
+            value = getattr(module, MODULE_ATTRS[key])
+        self[key] = value
+        return value
+
+    def load(self):
+        module = importlib.import_module(self["module"])
+        # The metadata is a copy of the module's; catch them drifting apart
+        declared = (module.SHEET, list(module.COLUMNS), module.DEFAULTS)
+        if declared != (self["sheet"], list(self["columns"]), self["defaults"]):
+            raise ValueError(f"{self['module']}: SHEET/COLUMNS/DEFAULTS don't match its registry entry")
+        return module
+
 
 SCRIPTS = {
-    "Social Events Accordion": {
-        "func": script_social.run, # now expects (input_path, original_name)
-        "needs_target": False
-    },
-    "Calendar Accordion": {
-        "func": script_calendar.run, # now expects (input_path, original_name)
-        "needs_target": False
-    },
-    "Presidents Table": {
-        "func": script_president.run, # now expects (input_path, original_name)
-        "needs_target": False
-    },
-        "Officers Table": {
-        "func": script_officers.run, # now expects (input_path, original_name)
-        "needs_target": False
-    }
-}
\ No newline at end of file
+    "Social Events Accordion": Processor({
+        "module": "processors.script_social",
+        "needs_target": False,
+        "slug": "social",
+        "lazy": True, # render(..., lazy=True) ships bodies as JSON, filled in on expand
+        "search": True, # render(..., search=True) embeds a search index and filter box
+        "sheet": "Events",
+        "columns": ["Title", "Description"],
+        "defaults": {"Title": "Untitled", "Description": ""},
+    }),
+    "Calendar Accordion": Processor({
+        "module": "processors.script_calendar",
+        "needs_target": False,
+        "slug": "calendar",
+        "lazy": True, # render(..., lazy=True) ships bodies as JSON, filled in on expand
+        "search": True, # render(..., search=True) embeds a search index and filter box
+        "sheet": "Events",
+        "columns": ["StartDate", "EndDate", "Description"],
+        "defaults": {},
+    }),
+    "Presidents Table": Processor({
+        "module": "processors.script_president",
+        "needs_target": False,
+        "slug": "presidents",
+        "lazy": False,
+        "search": False,
+        "sheet": "Presidents",
+        "columns": ["Year", "Name"],
+        "defaults": {},
+    }),
+    "Officers Table": Processor({
+        "module": "processors.script_officers",
+        "needs_target": False,
+        "slug": "officers",
+        "lazy": False,
+        "search": False,
+        "sheet": "Officers",
+        "columns": ["Name", "Office"],
+        "defaults": {},
+    }),
+}
+
+
+# ---------------------------------------------------------
+# Third-party processors: an entry point in the
+# "pioneerhtml.processors" group names a metadata dict, e.g.
+#
+#   [project.entry-points."pioneerhtml.processors"]
+#   "Roster Table" = "pioneer_roster.meta:PROCESSOR"
+#
+# with PROCESSOR = {"module": "pioneer_roster.render", "slug": ...}.
+# Keep that module light: it is imported at startup, the "module"
+# it points to only when the processor runs.
+# ---------------------------------------------------------
+def make_processor(metadata):
+    missing = [key for key in REQUIRED_KEYS if key not in metadata]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+    return Processor({**OPTIONAL_KEYS, **metadata})
+
+
+def discover(group=ENTRY_POINT_GROUP):
+    """Add the processors installed under `group` to SCRIPTS; built-ins keep their names and slugs."""
+    slugs = {info["slug"] for info in SCRIPTS.values()}
+    for entry_point in entry_points(group=group):
+        try:
+            info = make_processor(entry_point.load())
+        except Exception as e:
+            logger.warning("Skipping processor %r from %s: %s", entry_point.name, entry_point.value, e)
+            continue
+        if entry_point.name in SCRIPTS or info["slug"] in slugs:
+            logger.warning("Skipping processor %r: name or slug %r already taken", entry_point.name, info["slug"])
+            continue
+        SCRIPTS[entry_point.name] = info
+        slugs.add(info["slug"])
+
+
+discover()
+
+
+# ---------------------------------------------------------
+# "Run all": one workbook load shared by every processor
+# ---------------------------------------------------------
+def wanted_sheets(names):
+    """
+    Merge the sheets/columns the given processors need into one
+    read_sheets() request. Defaults aren't merged: each processor's own
+    are filled in by processor_frame().
+    """
+    wanted = {}
+    for name in names:
+        info = SCRIPTS[name]
+        columns, _ = wanted.setdefault(info["sheet"], ([], {}))
+        for col in info["columns"]:
+            if col not in columns:
+                columns.append(col)
+    return wanted
+
+
+def processor_frame(df, info):
+    """
+    The shared sheet as one processor would have read it alone: its missing
+    columns get its own defaults, and one with no default raises KeyError.
+    """
+    missing = [col for col in info["columns"] if col not in df.columns]
+    absent = [col for col in missing if col not in info["defaults"]]
+    if absent:
+        raise KeyError(f"Sheet '{info['sheet']}' has no column(s): {', '.join(absent)}")
+    if missing:
+        df = df.assign(**{col: info["defaults"][col] for col in missing})
+    return df
+
+
+def run_all(source, original_name, names=None, progress=None, lazy=False, search=False, optimize=False,
+            exports=()):
+    """
+    Load the workbook once and run every processor on its own sheet, in parallel.
+
+    `source` is a path, the .xlsx bytes, or a binary file object; nothing is
+    written to disk. Returns (results, archive_bytes). `results` maps each
+    script name to a dict with "file_name", "html" and "error"; one failing
+    processor doesn't stop the others. The ZIP holds every output that rendered.
+    `progress` (optional) is called with each stage name as it starts.
+    `lazy` picks the lazy-body output for the processors that have one,
+    `search` the embedded search index likewise.
+    `optimize` minifies every output and adds "artifacts" (see
+    utils.optimize.optimize) to its result; the ZIP then holds the
+    minified HTML with its .gz/.br siblings.
+    `exports` lists formats (see processors.records) to write next to the
+    HTML, from the same parsed rows, for the processors that offer them;
+    they go in each result's "exports" ({file name: text}) and the ZIP.
+    """
+    names = list(names or SCRIPTS)
+
+    # pandas/openpyxl load here, with the first job that needs them
+    from utils.excel_reader import read_sheets
+
+    report(progress, "read")
+    sheets = read_sheets(source, wanted_sheets(names))
+    base, _ = os.path.splitext(original_name)
+
+    def file_name_for(name):
+        return f"{base}_{SCRIPTS[name]['slug']}.html"
+
+    def render_one(name):
+        info = SCRIPTS[name]
+        if info["sheet"] not in sheets:
+            raise KeyError(f"Workbook has no '{info['sheet']}' sheet")
+        options = {}
+        if lazy and info["lazy"]:
+            options["lazy"] = True
+        if search and info["search"]:
+            options["search"] = True
+        df = processor_frame(sheets[info["sheet"]], info)
+        formats = [fmt for fmt in exports if fmt in info["exports"]]
+        if formats:
+            texts = info["emit_frame"](df, formats, **options)
+            html = texts.pop("html")
+        else:
+            # Streamed, so a cancelled job stops mid-render
+            html = "".join(cancellable(info["stream_frame"](df, **options), progress))
+            texts = {}
+
+        # Compressing runs in the same worker, next to the render
+        output = optimize_html(html, file_name_for(name)) if optimize else {"html": html}
+        stem = os.path.splitext(file_name_for(name))[0]
+        output["exports"] = {f"{stem}.{fmt}": text for fmt, text in texts.items()}
+        return output
+
+    report(progress, "render")
+    with ThreadPoolExecutor(max_workers=len(names)) as pool:
+        futures = {name: pool.submit(render_one, name) for name in names}
+
+    results = {}
+    for name, future in futures.items():
+        file_name = file_name_for(name)
+        try:
+            output = future.result()
+            results[name] = {"file_name": file_name, "html": output["html"], "exports": output.pop("exports"),
+                             "error": None}
+            if optimize:
+                results[name]["artifacts"] = output
+        except Exception as e:
+            results[name] = {"file_name": file_name, "html": None, "error": e}
+
+    report(progress, "write")
+    outputs = {}
+    for result in results.values():
+        if result["error"] is not None:
+            continue
+        if optimize:
+            outputs.update(result["artifacts"]["files"])
+        else:
+            outputs[result["file_name"]] = result["html"]
+        outputs.update(result["exports"])
+    archive = build_archive(outputs) if outputs else None
+
+    return results, archive
@@ -1,9 +1,67 @@
+import calendar
+import hashlib
+import heapq
+import itertools
 import os
-from utils.file_io import build_output_filename
+import pickle
+import shutil
+import tempfile
+from utils.file_io import write_output
+from utils.excel_reader import iter_frames, read_frame
+from utils.jobs import cancellable, check_cancelled, report
+from utils.instrument import instrument
+from utils.render_cache import get_fragment_cache
+from utils.lazy_accordion import NOSCRIPT, iter_payload, lazy_item
+from utils.search_index import build_index, iter_search
+from processors.records import Event, export, from_columns, values
+import numpy as np
 import pandas as pd
-from collections import defaultdict
 from pathlib import Path
 
+# Bump when the generated HTML changes, so cached renders are invalidated
+VERSION = "3"
+
+SHEET = "Events"
+COLUMNS = ["StartDate", "EndDate", "Description"]
+DEFAULTS = {}
+
+# Group for rows without a StartDate
+UNTITLED = "Untitled"
+
+# Text a blank Description shows as: str() of the NaN pandas reads it as. The
+# original showed "NaT" instead on rows of dates only (iterrows() typed the row
+# as dates); "nan" is what every other blank showed, so all do now
+BLANK_DESCRIPTION = "nan"
+
+# Formats besides HTML the events can be exported to (see processors.records)
+EXPORTS = ("ics", "json", "csv")
+
+# Order of the events within a group, and the event_frame() columns an Event is made of
+SORT_KEYS = ["no_start", "start", "duration", "position"]
+RECORD_COLUMNS = ["title", "description", "start_date", "end_date", "date", "day"]
+
+# Memory ceiling for grouping in MB; unset or 0 groups in memory. Above it, sheets
+# are grouped through run files on disk (see spill_groups). Read per build, not at
+# import, so a bad value fails the calendar only (see default_memory_limit)
+MEMORY_LIMIT_ENV = "PIONEER_CALENDAR_MEMORY_MB"
+
+# Peak bytes per row while a piece of the sheet is read and sorted (about 640
+# measured on 100k rows, plus headroom for the run batches being merged)
+ROW_BYTES = 1536
+
+# Rows pickled together in a run file
+RUN_BATCH = 1000
+
+# PIONEER_CALENDAR_INCREMENTAL=1 keeps each month's table in the shared
+# fragment store between runs (see month_tables); off, nothing is cached
+INCREMENTAL = os.environ.get("PIONEER_CALENDAR_INCREMENTAL", "0") == "1"
+
+# Names used in titles and dates; swap these to localize the output
+MONTH_NAMES = np.array(calendar.month_name, dtype=object)  # index 1-12
+MONTH_ABBR = np.array(calendar.month_abbr, dtype=object)
+DAY_NAMES = np.array(calendar.day_name, dtype=object)  # index 0-6, Monday first
+DAY_ABBR = np.array(calendar.day_abbr, dtype=object)
+
 # ---------------------------------------------------------
 # Detect if the date field is a date, a range of dates or a string
 # ---------------------------------------------------------
@@ -74,80 +132,360 @@ def format_day_or_range(start, end):
     return str(start)
 
 # ---------------------------------------------------------
-# Safe sorting for dates within a month
+# Group keys: a month is a pd.Period, anything else is its own
+# text label. The display title is only made when rendering.
 # ---------------------------------------------------------
-def sort_key(row):
-    raw_start, raw_end, _, _, _ = row
+def month_title(key):
+    if isinstance(key, pd.Period):
+        return f"{MONTH_NAMES[key.month]} {key.year}"
+    return key
 
-    start_dt = pd.to_datetime(raw_start, errors="coerce")
-    end_dt   = pd.to_datetime(raw_end, errors="coerce")
+# ---------------------------------------------------------
+# Scalar fallback for cells the columnar parser can't handle
+# (free text like "TBD", or an EndDate that isn't a date)
+# ---------------------------------------------------------
+def fallback_key(raw_date):
+    """Group key for one row: its month Period, or the raw text."""
+    try:
+        key = pd.Period(pd.to_datetime(raw_date), "M")
+    except:
+        key = pd.NaT
+    if key is pd.NaT:
+        key = str(raw_date)
+    return key
 
-    # Duration: if no end date, treat as 0-day event
-    if pd.isna(start_dt):
-        return (pd.Timestamp.max, 999999)  # push invalid dates to bottom
+def format_row_fallback(raw_date, raw_end_date):
+    """(group key, date, day) for one row; the key is a month Period or the raw text."""
+    key = fallback_key(raw_date)
 
-    if pd.isna(end_dt):
-        duration = 0
-    else:
-        duration = (end_dt - start_dt).days
+    try:
+        date = format_date_or_range(raw_date, raw_end_date)
+    except:
+        date = str(raw_date)
+    try:
+        day = format_day_or_range(raw_date, raw_end_date)
+    except:
+        day = ""
+
+    return key, date, day
+
+# ---------------------------------------------------------
+# Parse a whole date column at once
+# ---------------------------------------------------------
+def parse_date_column(col):
+    if pd.api.types.is_datetime64_any_dtype(col):
+        return col
+    # "mixed" parses every cell on its own, like pd.to_datetime(scalar)
+    return pd.to_datetime(col, errors="coerce", format="mixed")
 
-    return (start_dt, duration)
+# ---------------------------------------------------------
+# Vectorized month / date / day for parseable rows
+# ---------------------------------------------------------
+def format_columns(start, end):
+    single = end.isna().to_numpy()
+    end = end.fillna(start)
+
+    start_dt = start.dt.normalize()
+    end_dt = end.dt.normalize()
+    num_days = (end_dt - start_dt).dt.days.to_numpy()
+
+    start_month = start_dt.dt.month.to_numpy()
+    end_month = end_dt.dt.month.to_numpy()
+    start_weekday = start_dt.dt.weekday.to_numpy()
+    end_weekday = end_dt.dt.weekday.to_numpy()
+
+    # Numbers to names by table lookup, not strftime per cell
+    start_day = start_dt.dt.day.astype(str).to_numpy(dtype=object)
+    end_day = end_dt.dt.day.astype(str).to_numpy(dtype=object)
+    start_short = MONTH_ABBR[start_month]
+
+    same_month = (start_month == end_month) & (start_dt.dt.year == end_dt.dt.year).to_numpy()
+
+    # "January 1" / "Jan 1-3" / "Sep 29-Oct 2"
+    date = np.select(
+        [single | (num_days < 1), same_month],
+        [MONTH_NAMES[start_month] + " " + start_day,
+         start_short + " " + start_day + "-" + end_day],
+        start_short + " " + start_day + "-" + MONTH_ABBR[end_month] + " " + end_day,
+    )
+
+    # "Monday" / "" for long or backwards ranges / "Mon-Wed"
+    day = np.select(
+        [single, (num_days > 7) | (num_days < 0)],
+        [DAY_NAMES[start_weekday], ""],
+        DAY_ABBR[start_weekday] + "-" + DAY_ABBR[end_weekday],
+    )
+
+    return start.dt.to_period("M"), date, day
 
 # ---------------------------------------------------------
-# Read Excel and group rows by accordion title
+# Read Excel and group rows by month (or by text label)
 # ---------------------------------------------------------
 def read_excel_grouped(path):
-    df = pd.read_excel(path, sheet_name="Events")
+    df = read_frame(path, SHEET, COLUMNS)
+    return group_events(df)
 
-    groups = defaultdict(list)
+def group_events(df):
+    return groups_from_frame(event_frame(df), float_column(df["Description"]))
 
-    for _, row in df.iterrows():
-        
-        raw_date = row["StartDate"]
-        raw_end_date = row["EndDate"]
-        
-        # Accordion title: Month + Year
-        #raw_title = row["AccordionTitle"]
-        if pd.notnull(raw_date):
-            #Establish Accordian Group
-            try:
-                title = pd.to_datetime(raw_date).strftime("%B %Y")
-            except:
-                title = str(raw_date)
-                
-            #Determine Dates of event
-            try:
-                date = format_date_or_range(raw_date, raw_end_date)
-            except:
-                date = str(raw_date)
-            try:
-                day = format_day_or_range(raw_date, raw_end_date)
-            except:
-                day = ""
+def classify_rows(df):
+    """
+    (start, end, has_start, regular, irregular): the parsed dates, and which
+    rows the columnar formatter handles (regular) or format_row_fallback() does.
+    """
+    raw_start = df["StartDate"]
+    raw_end = df["EndDate"]
+
+    start = parse_date_column(raw_start)
+    end = parse_date_column(raw_end)
+
+    has_start = raw_start.notna()
+    regular = has_start & start.notna() & (raw_end.isna() | end.notna())
+    return start, end, has_start, regular, has_start & ~regular
+
+def row_groups(df):
+    """
+    The group key (month Period or text label) of every row, as a list,
+    without formatting any dates; see event_frame().
+    """
+    start, _, has_start, regular, irregular = classify_rows(df)
+    keys = np.full(len(df), UNTITLED, dtype=object)
+    keys[regular.to_numpy()] = list(start[regular].dt.to_period("M"))
+    for i in np.flatnonzero(irregular.to_numpy()):
+        keys[i] = fallback_key(df["StartDate"].iloc[i])
+    return list(keys)
+
+def event_frame(df, offset=0, positions=None):
+    """
+    One row per event, sorted into page order: its group (month, label),
+    the keys it is sorted on, and its record fields. `offset` is the sheet
+    position of df's first row, for a sheet read in pieces; `positions`
+    gives each row's sheet position, for rows picked out of a sheet.
+    """
+    raw_start = df["StartDate"]
+    raw_end = df["EndDate"]
+    start, end, has_start, regular, irregular = classify_rows(df)
+
+    # A row is keyed by its month, or (no month) by a text label:
+    # rows without a StartDate go under UNTITLED
+    month = pd.Series(pd.NaT, index=df.index, dtype="period[M]")
+    label = pd.Series("", index=df.index, dtype=object)
+    label[~has_start] = UNTITLED
+    date = pd.Series("", index=df.index, dtype=object)
+    day = pd.Series("", index=df.index, dtype=object)
+
+    if regular.any():
+        month[regular], date[regular], day[regular] = format_columns(start[regular], end[regular])
+
+    for i in np.flatnonzero(irregular.to_numpy()):
+        index = df.index[i]
+        key, date[index], day[index] = format_row_fallback(raw_start.iloc[i], raw_end.iloc[i])
+        if isinstance(key, pd.Period):
+            month[index] = key
         else:
-            title = "Untitled"
-            date = ""
-            day = ""
-        
-        desc = str(row["Description"])
+            label[index] = key
+
+    # Month groups in calendar order; UNTITLED and free-text groups
+    # go last, in the order they first appear
+    position = np.arange(offset, offset + len(df)) if positions is None else np.asarray(positions)
+    first_seen = (pd.Series(position, index=df.index)
+                  .groupby([month, label], sort=False, dropna=False).transform("min"))
+
+    # Within a month: by start, then by duration; unparseable starts last
+    duration = (end - start).dt.days.fillna(0)
+
+    frame = pd.DataFrame({
+        "month": month,
+        "first_seen": first_seen,
+        "no_start": start.isna(),
+        "start": start,
+        "duration": duration,
+        "position": position,
+        "label": label,
+        "title": None, # the calendar doesn't read Title
+        # Raw cells; their text depends on the whole column, see description_text()
+        "description": values(df["Description"]),
+        "start_date": start.dt.date,
+        "end_date": end.dt.date,
+        "date": date,
+        "day": day,
+    })
+    return frame.sort_values(["month", "first_seen"] + SORT_KEYS, na_position="last")
+
+def page_order(first_seen):
+    """Group keys in page order, from {key: sheet position of its first row}."""
+    # Months in calendar order, then text groups in the order they first appear
+    months = sorted(key for key in first_seen if isinstance(key, pd.Period))
+    labels = sorted((key for key in first_seen if not isinstance(key, pd.Period)), key=first_seen.get)
+    return months + labels
+
+def float_column(col):
+    """Whether pandas typed the Description column float: numbers only, with a blank or a fraction."""
+    return pd.api.types.is_float_dtype(col)
+
+def description_text(value, float_description):
+    """
+    A Description cell as str() showed it on the sheet's column: a number
+    in a float column as "3.0", anything else as itself. Blank is None
+    (see BLANK_DESCRIPTION).
+    """
+    if value is None:
+        return None
+    if float_description and isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(float(value))
+    return str(value)
+
+def groups_from_frame(frame, float_description=False):
+    # Keys are month Periods or text labels; see month_title(). Values are Event records
+    groups = {}
+    for (period, text), chunk in frame.groupby(["month", "label"], sort=False, dropna=False):
+        key = text if period is pd.NaT else period
+        # values() turns the blanks (NaN/NaT, whatever the column's dtype) into None
+        columns = {c: values(chunk[c]) for c in RECORD_COLUMNS}
+        columns["description"] = [description_text(v, float_description) for v in columns["description"]]
+        groups[key] = from_columns(Event, *columns.values())
+
+    return groups
 
-        # Store the raw start date so we can sort later
-        groups[title].append((raw_date, raw_end_date, date, day, desc))
 
-    # 🔥 Sort each month by actual date and duration
-    for title in groups:
-        #groups[title].sort(key=lambda x: pd.to_datetime(x[0]))
-        groups[title].sort(key=sort_key)
+# ---------------------------------------------------------
+# Bounded memory: the sheet is read a piece at a time, each
+# piece is sorted like the in-memory path and every group's rows
+# go to a run file; at render time a group's runs are merged back
+# in order. Only one piece, or one batch per run, is in memory.
+# ---------------------------------------------------------
+def _read_run(path, offset, batches):
+    with open(path, "rb") as f:
+        f.seek(offset)
+        for _ in range(batches):
+            yield from pickle.load(f)
 
+class SpilledGroups:
+    """
+    Groups whose rows live in run files under `directory`. Reads like the
+    dict from group_events(): keys in page order, and each value a fresh
+    iterator over the group's Event records. close() removes the files.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.rows = 0
+        self._runs = {}  # group key -> [(path, offset, batches)]
+        self._first_seen = {}
+        # Whether the whole Description column would be float, from each piece's dtype
+        self._numbers_only = True
+        self._any_float = False
+
+    @property
+    def float_description(self):
+        return self._numbers_only and self._any_float
+
+    def spill(self, frame, description):
+        """
+        Write the groups of a sorted event_frame() piece as one run each.
+        `description` is the piece's Description column; see float_column().
+        """
+        if description.isna().all():
+            # Only blanks: typed object on its own, but in a number column they make it float
+            self._any_float = True
+        else:
+            self._any_float = self._any_float or float_column(description)
+            self._numbers_only = self._numbers_only and (float_column(description)
+                                                         or pd.api.types.is_integer_dtype(description))
+        # Columns to lists once per piece; the sort leaves each group's rows contiguous
+        months = values(frame["month"])
+        labels = values(frame["label"])
+        first_seen = values(frame["first_seen"])
+        rows = list(zip(*(values(frame[c]) for c in SORT_KEYS + RECORD_COLUMNS)))
+
+        path = os.path.join(self.directory, f"run{len(os.listdir(self.directory))}.pkl")
+        with open(path, "wb") as f:
+            for (period, text), positions in itertools.groupby(range(len(rows)), lambda i: (months[i], labels[i])):
+                positions = list(positions)
+                key = text if period is None else period
+                # Pieces come in sheet order, so the first piece with a group saw it first
+                self._first_seen.setdefault(key, first_seen[positions[0]])
+
+                group = rows[positions[0]:positions[-1] + 1]
+                offset = f.tell()
+                for start in range(0, len(group), RUN_BATCH):
+                    pickle.dump(group[start:start + RUN_BATCH], f, pickle.HIGHEST_PROTOCOL)
+                self._runs.setdefault(key, []).append((path, offset, -(-len(group) // RUN_BATCH)))
+        self.rows += len(frame)
+
+    def keys(self):
+        return page_order(self._first_seen)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self._runs)
+
+    def __getitem__(self, key):
+        runs = [_read_run(*run) for run in self._runs[key]]
+        # Same order as the in-memory sort: rows start with their SORT_KEYS
+        merged = heapq.merge(*runs, key=lambda row: row[:len(SORT_KEYS)])
+        return (self._event(row[len(SORT_KEYS):]) for row in merged)
+
+    def _event(self, fields):
+        title, desc, *rest = fields
+        return Event(title, description_text(desc, self.float_description), *rest)
+
+    def items(self):
+        return ((key, self[key]) for key in self.keys())
+
+    def values(self):
+        return (self[key] for key in self.keys())
+
+    def close(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def default_memory_limit():
+    """PIONEER_CALENDAR_MEMORY_MB in bytes; 0 when unset."""
+    value = os.environ.get(MEMORY_LIMIT_ENV, "").strip() or "0"
+    if not value.isdigit():
+        raise ValueError(f"{MEMORY_LIMIT_ENV} must be a whole number of megabytes, e.g. 256; got {value!r}")
+    return int(value) * 1024 * 1024
+
+def spill_groups(source, memory_limit=None, directory=None, progress=None):
+    """
+    Group the Events sheet of `source` while holding about `memory_limit`
+    bytes (default default_memory_limit()) of it at a time. Returns SpilledGroups,
+    which iter_document() takes in place of group_events() and renders to
+    the same page. Run files go in a new directory under `directory`
+    (default: the system temp directory).
+    """
+    rows_per_piece = max(RUN_BATCH, (memory_limit or default_memory_limit()) // ROW_BYTES)
+
+    report(progress, "read")
+    groups = SpilledGroups(tempfile.mkdtemp(prefix="calendar-", dir=directory))
+    try:
+        # Reading and grouping are one streamed pass here
+        for df in iter_frames(source, SHEET, COLUMNS, rows_per_frame=rows_per_piece):
+            check_cancelled(progress)
+            groups.spill(event_frame(df, offset=groups.rows), df["Description"])
+    except BaseException:
+        groups.close()
+        raise
+    report(progress, "transform", rows=groups.rows)
     return groups
 
 
 # ---------------------------------------------------------
 # Build a 3-column table for each accordion body
 # ---------------------------------------------------------
-def build_table(rows):
-    html = []
-    html.append("""
+def description(event):
+    return BLANK_DESCRIPTION if event.description is None else event.description
+
+def iter_table(rows):
+    yield """
         <table class="event-table">
             <thead>
                 <tr>
@@ -157,34 +495,88 @@ def build_table(rows):
                 </tr>
             </thead>
             <tbody>
-    """)
+    """
 
-    for i, (_, _, date, day, desc) in enumerate(rows):
+    for i, event in enumerate(rows):
         row_class = "even-row" if i % 2 == 0 else "odd-row"
-        html.append(f"""
+        yield "\n"
+        yield f"""
                 <tr class="{row_class}">
-                    <td class="col-date">{date}</td>
-                    <td class="col-day">{day}</td>
-                    <td class="col-desc">{desc}</td>
+                    <td class="col-date">{event.date}</td>
+                    <td class="col-day">{event.day}</td>
+                    <td class="col-desc">{description(event)}</td>
                 </tr>
-        """)
+        """
 
-    html.append("""
+    yield "\n"
+    yield """
             </tbody>
         </table>
-    """)
-    return "\n".join(html)
+    """
 
+def build_table(rows):
+    return "".join(iter_table(rows))
+
+def compact_table(rows):
+    """The same table without the indentation, for the lazy JSON payload."""
+    parts = ['<table class="event-table"><thead><tr><th class="col-date">Date</th>'
+             '<th class="col-day">Day</th><th class="col-desc">Description</th></tr></thead><tbody>']
+    for i, event in enumerate(rows):
+        row_class = "even-row" if i % 2 == 0 else "odd-row"
+        parts.append(f'<tr class="{row_class}"><td class="col-date">{event.date}</td>'
+                     f'<td class="col-day">{event.day}</td><td class="col-desc">{description(event)}</td></tr>')
+    parts.append("</tbody></table>")
+    return "".join(parts)
+
+# ---------------------------------------------------------
+# Incremental rendering (opt-in): a month's table is stored under a
+# hash of its raw sheet rows, taken before any date is formatted, so
+# an unchanged month is never formatted or rendered again
+# ---------------------------------------------------------
+def month_tables(df, fragments):
+    """
+    {group key: table HTML} in page order for the Events sheet `df`, using
+    the `fragments` store (see utils.render_cache). Only the rows of months
+    missing from the store are formatted and rendered.
+    """
+    positions = {}
+    for i, key in enumerate(row_groups(df)):
+        positions.setdefault(key, []).append(i)
+
+    # One 64-bit hash per raw row; a month's key hashes its rows in sheet order
+    row_hashes = pd.util.hash_pandas_object(df[COLUMNS], index=False).to_numpy()
+    fragment_keys = {}
+    tables = {}
+    missed = []
+    for key, rows in positions.items():
+        h = hashlib.sha256(f"calendar-month\0{VERSION}\0".encode("utf-8"))
+        h.update(row_hashes[rows].tobytes())
+        fragment_keys[key] = h.hexdigest()
+        tables[key] = fragments.get(fragment_keys[key])
+        if tables[key] is None:
+            missed.extend(rows)
+
+    if missed:
+        missed.sort()
+        missed_groups = groups_from_frame(event_frame(df.iloc[missed], positions=missed),
+                                          float_column(df["Description"]))
+        for key, rows in missed_groups.items():
+            tables[key] = build_table(rows)
+            fragments.put(fragment_keys[key], tables[key], evict=False)
+    fragments.evict()
+
+    return {key: tables[key] for key in page_order({key: rows[0] for key, rows in positions.items()})}
 
 
 # ---------------------------------------------------------
 # Build one accordion item
 # ---------------------------------------------------------
-def build_accordion_item(title, table_html, index, accordion_id):
+def accordion_item_parts(title, index, accordion_id):
+    """Markup before and after the table body of one accordion item."""
     collapse_id = f"collapse{index}"
     heading_id = f"heading{index}"
 
-    return f"""
+    opening = f"""
         <div class="accordion-item custom-accordion-item">
             <h2 class="accordion-header" id="{heading_id}">
                 <button class="accordion-button custom-accordion-header collapsed"
@@ -202,36 +594,146 @@ def build_accordion_item(title, table_html, index, accordion_id):
                  aria-labelledby="{heading_id}"
                  data-bs-parent="#{accordion_id}">
                 <div class="accordion-body custom-accordion-body">
-                    {table_html}
+                    """
+    closing = """
                 </div>
             </div>
         </div>
     """
+    return opening, closing
+
+def iter_accordion_item(title, rows, index, accordion_id):
+    opening, closing = accordion_item_parts(title, index, accordion_id)
+    yield opening
+    yield from iter_table(rows)
+    yield closing
+
+def build_accordion_item(title, table_html, index, accordion_id):
+    opening, closing = accordion_item_parts(title, index, accordion_id)
+    return opening + table_html + closing
 
 
 # ---------------------------------------------------------
 # Build the full HTML document
 # ---------------------------------------------------------
 
-def safe_title_to_dt(title):
-    try:
-        return pd.to_datetime(title, format="%B %Y")
-    except:
-        return pd.Timestamp.max   # push non-dates to the end
-
 def generate_full_html(excel_path):
-    groups = read_excel_grouped(excel_path)
+    return build_document(read_excel_grouped(excel_path))
+
+def load(source, progress=None):
+    """Read + transform stages: workbook in, month groups out."""
+    report(progress, "read")
+    df = read_frame(source, SHEET, COLUMNS)
+    report(progress, "transform", rows=len(df))
+    return group_events(df)
 
+def render(source, progress=None, fragments=None, lazy=False, search=False, memory_limit=None):
+    """
+    Workbook path, bytes or file object in, HTML string out. Nothing touches
+    disk unless asked to, through `fragments` or `memory_limit`.
+    `progress` (optional) is called with each stage name as it starts.
+    With a `fragments` store (see month_tables()), months whose rows are
+    unchanged since the last run aren't formatted or rendered again.
+    `lazy` ships the tables as a JSON payload filled in on first expand.
+    `search` embeds a search index and a filter box over the events.
+    With a `memory_limit` in bytes (default: default_memory_limit(); 0 for
+    none) the events are grouped on disk; see spill_groups().
+    """
+    if memory_limit is None:
+        memory_limit = default_memory_limit()
+    if memory_limit:
+        with spill_groups(source, memory_limit, progress=progress) as groups:
+            report(progress, "render", rows=groups.rows)
+            return "".join(cancellable(iter_document(groups, None, lazy, search), progress))
+
+    report(progress, "read")
+    df = read_frame(source, SHEET, COLUMNS)
+    report(progress, "transform", rows=len(df))
+    chunks = frame_document(df, fragments, lazy, search)
+    report(progress, "render", rows=len(df))
+    # A cancelled job stops between rows, not only between stages
+    return "".join(cancellable(chunks, progress))
+
+def iter_full_html(excel_path):
+    """Same document as generate_full_html, yielded in chunks."""
+    return iter_document(read_excel_grouped(excel_path))
+
+def render_frame(df, lazy=False, search=False, fragments=None):
+    """Build the calendar from an already-loaded Events sheet."""
+    return "".join(frame_document(df, fragments, lazy, search))
+
+def iter_frame(df, lazy=False, search=False, fragments=None):
+    return frame_document(df, fragments, lazy, search)
+
+def frame_document(df, fragments=None, lazy=False, search=False):
+    """
+    iter_document() for an Events sheet. The plain page reuses the tables
+    of unchanged months from `fragments` (default: the shared store when
+    PIONEER_CALENDAR_INCREMENTAL=1, otherwise none); lazy and search pages
+    need every row, so they are always built in full.
+    """
+    if fragments is None and INCREMENTAL:
+        fragments = get_fragment_cache()
+    if fragments is not None and not lazy and not search:
+        tables = month_tables(df, fragments)
+        return iter_document(tables, tables)
+    return iter_document(group_events(df), None, lazy, search)
+
+def emit_frame(df, formats=(), lazy=False, search=False):
+    """
+    The page plus each of `formats` (see EXPORTS), all from one parse of
+    the Events sheet: {"html": page, format: text, ...}.
+    """
+    groups = group_events(df)
+    outputs = {"html": build_document(groups, None, lazy, search)}
+    outputs.update(export([event for rows in groups.values() for event in rows], formats))
+    return outputs
+
+def build_document(groups, tables=None, lazy=False, search=False):
+    return "".join(iter_document(groups, tables, lazy, search))
+
+def search_docs(groups):
+    """One search document per event: the month title, date, day and description of the row."""
+    for idx, (key, rows) in enumerate(groups.items()):
+        title = month_title(key)
+        for row, event in enumerate(rows):
+            yield idx, row, f"{title} {event.date} {event.day} {description(event)}"
+
+def iter_document(groups, tables=None, lazy=False, search=False):
+    """
+    Yield the page piece by piece: the head, then each month's item row by
+    row, then the footer. Nothing holds more than one chunk of the output.
+
+    With `tables` ({group key: table HTML}, see month_tables()), each
+    month's table is taken from there, in one chunk, and `groups` only
+    supplies the keys.
+    With `lazy`, items have empty bodies and the tables follow as one
+    JSON payload (see utils.lazy_accordion). With `search`, an index over
+    every event row follows (see utils.search_index).
+    """
     accordion_id = "accordionMaster"
 
-    accordion_items = []
+    yield document_head(accordion_id)
 
-    sorted_groups = sorted(groups.items(), key=lambda item: safe_title_to_dt(item[0]))
+    if lazy:
+        yield NOSCRIPT
+        for idx, key in enumerate(groups, start=1):
+            yield lazy_item(month_title(key), idx, accordion_id)
+        yield from iter_payload(compact_table(rows) for rows in groups.values())
+    else:
+        for idx, key in enumerate(groups, start=1):
+            title = month_title(key)
+            if tables is None:
+                yield from iter_accordion_item(title, groups[key], idx, accordion_id)
+            else:
+                yield build_accordion_item(title, tables[key], idx, accordion_id)
+
+    if search:
+        yield from iter_search(build_index(search_docs(groups)))
 
-    for idx, (title, rows) in enumerate(sorted_groups, start=1):
-        table_html = build_table(rows)
-        accordion_items.append(build_accordion_item(title, table_html, idx, accordion_id))
+    yield DOCUMENT_TAIL
 
+def document_head(accordion_id):
     return f"""
 <!DOCTYPE html>
 <html>
@@ -314,7 +816,9 @@ def generate_full_html(excel_path):
 <body style="padding: 2px;">
 
     <div class="accordion" id="{accordion_id}">
-        {''.join(accordion_items)}
+        """
+
+DOCUMENT_TAIL = """
     </div>
 
     <!-- Bootstrap JS Bundle -->
@@ -327,12 +831,23 @@ def generate_full_html(excel_path):
 # ---------------------------------------------------------
 # Write output to accordian_out.html
 # ---------------------------------------------------------
-def run(input_path, original_name):
-    output_path = build_output_filename(original_name, ".html")
-
-    html_output = generate_full_html(input_path)
-
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write(html_output)
+def run(input_path, original_name, lazy=False, search=False, memory_limit=None, fragments=None):
+    if memory_limit is None:
+        memory_limit = default_memory_limit()
+
+    with instrument("calendar", original_name) as progress:
+        if memory_limit:
+            with spill_groups(input_path, memory_limit, progress=progress) as groups:
+                # Each month's rows are merged from disk as they are written out
+                report(progress, "write", rows=groups.rows)
+                return write_output(iter_document(groups, None, lazy, search), original_name)
+
+        report(progress, "read")
+        df = read_frame(input_path, SHEET, COLUMNS)
+        report(progress, "transform", rows=len(df))
+        chunks = frame_document(df, fragments, lazy, search)
+        # Rendering and writing are one streamed pass here
+        report(progress, "write", rows=len(df))
+        output_path = write_output(chunks, original_name)
 
     return output_path
\ No newline at end of file
@@ -1,37 +1,27 @@
-import os
-import math
-import pandas as pd
-from utils.file_io import build_output_filename
-from pathlib import Path
+from utils.file_io import write_output
+from utils.excel_reader import read_frame
+from utils.html_table import clean_cells, iter_table, render_table
+from utils.jobs import report
+from utils.instrument import instrument
+from processors.records import Officer, export, from_columns, values
 
-num_table_columns = 1
+# Bump when the generated HTML changes, so cached renders are invalidated
+VERSION = "2"
 
-def read_pairs_from_excel(xlsx_path):
-    """Read (year, name) pairs from an Excel file with columns 'Name' and 'Office'."""
-    df = pd.read_excel(xlsx_path, sheet_name="Officers", engine="openpyxl")
+SHEET = "Officers"
+COLUMNS = ["Name", "Office"]
+DEFAULTS = {}
 
-    # Ensure required columns exist
-    df = df[["Name", "Office"]]
+# Text a blank cell gets
+FILLS = {"Name": "N/A", "Office": ""}
 
-    # Clean values
-    df["Name"] = df["Name"].fillna("N/A").astype(str).str.strip()
-    df["Office"] = df["Office"].fillna("").astype(str).str.strip()
+# Formats besides HTML the rows can be exported to (see processors.records)
+EXPORTS = ("json", "csv")
 
-    # Convert to list of tuples
-    return list(df.itertuples(index=False, name=None))
+# Side-by-side copies of the column pair
+TABLE_COLUMNS = 1
 
-def split_into_columns(pairs, num_columns):
-    """Split the list of pairs evenly across the specified number of columns."""
-    total = len(pairs)
-    rows = math.ceil(total / num_columns)
-    return [pairs[i*rows:(i+1)*rows] for i in range(num_columns)], rows
-
-
-def generate_html(columns, rows):
-    """Generate the full HTML table string."""
-    html = []
-
-    html.append("""
+STYLE = """
 <style>
   table.eight-col {
     width: 100%;
@@ -81,48 +71,65 @@ def generate_html(columns, rows):
     font-weight: bold;
   }
 </style>
+"""
+
+
+def cells_from_frame(df):
+    """Clean an already-loaded Officers sheet into escaped cell strings."""
+    return clean_cells(df, FILLS)
+
+
+def render_frame(df):
+    """Build the table from an already-loaded Officers sheet."""
+    return render_table(cells_from_frame(df), TABLE_COLUMNS, STYLE)
 
-<table class="eight-col">
-  <tr>
-""")
 
-    # Header row
-    for _ in range(num_table_columns):
-        html.append("    <th>Name</th><th>Office</th>")
-    html.append("  </tr>\n")
+def iter_frame(df):
+    return iter_table(cells_from_frame(df), TABLE_COLUMNS, STYLE)
 
-    # Data rows
-    for r in range(rows):
-        html.append("  <tr>")
-        for col in columns:
-            if r < len(col):
-                name, office = col[r]
-                html.append(f"<td>{name}</td><td>{office}</td>")
-            else:
-                html.append("<td></td><td></td>")
-        html.append("</tr>\n")
 
-    html.append("</table>")
-    return "".join(html)
+def records_from_frame(df):
+    """Officer records, one per row of an already-loaded Officers sheet."""
+    return from_columns(Officer, *(values(df[name]) for name in COLUMNS))
 
 
-def write_html_to_file(html, output_path):
-    """Write the generated HTML to a file."""
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write(html)
+def emit_frame(df, formats=()):
+    """
+    The table plus each of `formats` (see EXPORTS) from one read of the
+    Officers sheet: {"html": table, format: text, ...}.
+    """
+    outputs = {"html": render_frame(df)}
+    if formats:
+        outputs.update(export(records_from_frame(df), formats))
+    return outputs
+
+
+def load(source, progress=None):
+    """Read + transform stages: workbook in, cleaned cells out."""
+    report(progress, "read")
+    df = read_frame(source, SHEET, COLUMNS)
+    report(progress, "transform", rows=len(df))
+    return cells_from_frame(df)
+
+
+def render(source, progress=None):
+    """
+    Workbook path, bytes or file object in, HTML string out. Nothing touches disk.
+    `progress` (optional) is called with each stage name as it starts.
+    """
+    cells = load(source, progress)
+    report(progress, "render", rows=len(cells))
+    return render_table(cells, TABLE_COLUMNS, STYLE)
 
 
 # ---------------------------------------------------------
 # Public run() function for Streamlit integration 
 # ---------------------------------------------------------
 def run(input_path, original_name):
-    output_path = build_output_filename(original_name, ".html")
-
-    pairs = read_pairs_from_excel(input_path)
-    columns, rows = split_into_columns(pairs, num_columns=num_table_columns)
-    html_output = generate_html(columns, rows)
-
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write(html_output)
+    with instrument("officers", original_name) as progress:
+        cells = load(input_path, progress)
+        # Rendering and writing are one streamed pass here
+        report(progress, "write", rows=len(cells))
+        output_path = write_output(iter_table(cells, TABLE_COLUMNS, STYLE), original_name)
 
-    return output_path
\ No newline at end of file
+    return output_path
@@ -1,35 +1,27 @@
-import os
-import math
-import pandas as pd
-from utils.file_io import build_output_filename
-from pathlib import Path
+from utils.file_io import write_output
+from utils.excel_reader import read_frame
+from utils.html_table import clean_cells, iter_table, render_table
+from utils.jobs import report
+from utils.instrument import instrument
+from processors.records import President, export, from_columns, values
 
-def read_pairs_from_excel(xlsx_path):
-    """Read (year, name) pairs from an Excel file with columns 'Year' and 'Name'."""
-    df = pd.read_excel(xlsx_path, sheet_name="Presidents", engine="openpyxl")
+# Bump when the generated HTML changes, so cached renders are invalidated
+VERSION = "2"
 
-    # Ensure required columns exist
-    df = df[["Year", "Name"]]
+SHEET = "Presidents"
+COLUMNS = ["Year", "Name"]
+DEFAULTS = {}
 
-    # Clean values
-    df["Year"] = df["Year"].astype(str).str.strip()
-    df["Name"] = df["Name"].fillna("").astype(str).str.strip()
+# Text a blank cell gets (a blank Year has always shown as "nan")
+FILLS = {"Year": "nan", "Name": ""}
 
-    # Convert to list of tuples
-    return list(df.itertuples(index=False, name=None))
+# Formats besides HTML the rows can be exported to (see processors.records)
+EXPORTS = ("json", "csv")
 
-def split_into_columns(pairs, num_columns=4):
-    """Split the list of pairs evenly across the specified number of columns."""
-    total = len(pairs)
-    rows = math.ceil(total / num_columns)
-    return [pairs[i*rows:(i+1)*rows] for i in range(num_columns)], rows
+# Side-by-side copies of the column pair
+TABLE_COLUMNS = 4
 
-
-def generate_html(columns, rows):
-    """Generate the full HTML table string."""
-    html = []
-
-    html.append("""
+STYLE = """
 <style>
   table.eight-col {
     width: 100%;
@@ -73,48 +65,66 @@ def generate_html(columns, rows):
     width: 5%;
   }
 </style>
+"""
+
+
+def cells_from_frame(df):
+    """Clean an already-loaded Presidents sheet into escaped cell strings."""
+    return clean_cells(df, FILLS)
+
+
+def render_frame(df):
+    """Build the table from an already-loaded Presidents sheet."""
+    return render_table(cells_from_frame(df), TABLE_COLUMNS, STYLE)
 
-<table class="eight-col">
-  <tr>
-""")
 
-    # Header row
-    for _ in range(4):
-        html.append("    <th>Year</th><th>Name</th>")
-    html.append("  </tr>\n")
+def iter_frame(df):
+    return iter_table(cells_from_frame(df), TABLE_COLUMNS, STYLE)
 
-    # Data rows
-    for r in range(rows):
-        html.append("  <tr>")
-        for col in columns:
-            if r < len(col):
-                year, name = col[r]
-                html.append(f"<td>{year}</td><td>{name}</td>")
-            else:
-                html.append("<td></td><td></td>")
-        html.append("</tr>\n")
 
-    html.append("</table>")
-    return "".join(html)
+def records_from_frame(df):
+    """President records, one per row of an already-loaded Presidents sheet."""
+    return from_columns(President, *(values(df[name]) for name in COLUMNS))
 
 
-def write_html_to_file(html, output_path):
-    """Write the generated HTML to a file."""
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write(html)
+def emit_frame(df, formats=()):
+    """
+    The table plus each of `formats` (see EXPORTS) from one read of the
+    Presidents sheet: {"html": table, format: text, ...}. The table is built
+    from the columns directly, which is faster than going row by row.
+    """
+    outputs = {"html": render_frame(df)}
+    if formats:
+        outputs.update(export(records_from_frame(df), formats))
+    return outputs
+
+
+def load(source, progress=None):
+    """Read + transform stages: workbook in, cleaned cells out."""
+    report(progress, "read")
+    df = read_frame(source, SHEET, COLUMNS)
+    report(progress, "transform", rows=len(df))
+    return cells_from_frame(df)
+
+
+def render(source, progress=None):
+    """
+    Workbook path, bytes or file object in, HTML string out. Nothing touches disk.
+    `progress` (optional) is called with each stage name as it starts.
+    """
+    cells = load(source, progress)
+    report(progress, "render", rows=len(cells))
+    return render_table(cells, TABLE_COLUMNS, STYLE)
 
 
 # ---------------------------------------------------------
 # Public run() function for Streamlit integration 
 # ---------------------------------------------------------
 def run(input_path, original_name):
-    output_path = build_output_filename(original_name, ".html")
-
-    pairs = read_pairs_from_excel(input_path)
-    columns, rows = split_into_columns(pairs, num_columns=4)
-    html_output = generate_html(columns, rows)
-
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write(html_output)
+    with instrument("presidents", original_name) as progress:
+        cells = load(input_path, progress)
+        # Rendering and writing are one streamed pass here
+        report(progress, "write", rows=len(cells))
+        output_path = write_output(iter_table(cells, TABLE_COLUMNS, STYLE), original_name)
 
     return output_path
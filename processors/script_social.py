@@ -1,23 +1,40 @@
-import pandas as pd
-from pathlib import Path
 import html
-import os
-from utils.file_io import build_output_filename
+from utils.file_io import write_output
+from utils.excel_reader import read_frame
+from utils.jobs import cancellable, report
+from utils.instrument import instrument
+from utils.lazy_accordion import NOSCRIPT, iter_payload, lazy_item
+from utils.search_index import build_index, iter_search
+from processors.records import Event, export, text
+
+# Bump when the generated HTML changes, so cached renders are invalidated
+VERSION = "1"
+
+SHEET = "Events"
+COLUMNS = ["Title", "Description"]
+DEFAULTS = {"Title": "Untitled", "Description": ""}
+
+# Text a blank Title shows as: str() of the NaN pandas reads it as. The original
+# showed "NaT" instead when the row's Description was a date (iterrows() typed
+# the row as dates); "nan" is what every other blank Title showed, so all do now
+BLANK_TITLE = "nan"
+
+# Formats besides HTML the events can be exported to (see processors.records)
+EXPORTS = ("json", "csv")
 
 # ---------------------------------------------------------
-# Read Excel and return list of (title, description)
+# Read Excel and return list of Event records (title, description)
 # ---------------------------------------------------------
 def read_excel_rows(path):
-    df = pd.read_excel(path, sheet_name="Events")
+    return event_rows(read_frame(path, SHEET, COLUMNS, DEFAULTS))
 
-    rows = []
-    for _, row in df.iterrows():
-        title = str(row.get("Title", "Untitled"))
-        desc_raw = row.get("Description", "")
-        desc = "" if pd.isnull(desc_raw) else str(desc_raw)
-        rows.append((title, desc))
+def event_rows(df):
+    return [Event(text(title_raw), text(desc_raw)) for title_raw, desc_raw in zip(df["Title"], df["Description"])]
 
-    return rows
+def shown(event):
+    """(title, description) as the page shows them."""
+    title = BLANK_TITLE if event.title is None else event.title
+    return title, event.description or ""
 
 
 # ---------------------------------------------------------
@@ -59,15 +76,76 @@ def build_accordion_item(title, body_text, index, accordion_id):
 # Build the full HTML document
 # ---------------------------------------------------------
 def generate_full_html(excel_path):
-    rows = read_excel_rows(excel_path)
+    return build_document(read_excel_rows(excel_path))
+
+def load(source, progress=None):
+    """Read + transform stages: workbook in, Event records out."""
+    report(progress, "read")
+    df = read_frame(source, SHEET, COLUMNS, DEFAULTS)
+    report(progress, "transform", rows=len(df))
+    return event_rows(df)
+
+def render(source, progress=None, lazy=False, search=False):
+    """
+    Workbook path, bytes or file object in, HTML string out. Nothing touches disk.
+    `progress` (optional) is called with each stage name as it starts.
+    `lazy` ships the bodies as a JSON payload filled in on first expand.
+    `search` embeds a search index and a filter box over the items.
+    """
+    rows = load(source, progress)
+    report(progress, "render", rows=len(rows))
+    return "".join(cancellable(iter_document(rows, lazy, search), progress))
+
+def iter_full_html(excel_path):
+    """Same document as generate_full_html, yielded in chunks."""
+    return iter_document(read_excel_rows(excel_path))
+
+def render_frame(df, lazy=False, search=False):
+    """Build the accordion from an already-loaded Events sheet."""
+    return build_document(event_rows(df), lazy, search)
+
+def iter_frame(df, lazy=False, search=False):
+    return iter_document(event_rows(df), lazy, search)
+
+def emit_frame(df, formats=(), lazy=False, search=False):
+    """
+    The page plus each of `formats` (see EXPORTS), all from one parse of
+    the Events sheet: {"html": page, format: text, ...}.
+    """
+    events = event_rows(df)
+    outputs = {"html": build_document(events, lazy, search)}
+    outputs.update(export(events, formats))
+    return outputs
+
+def build_document(rows, lazy=False, search=False):
+    return "".join(iter_document(rows, lazy, search))
+
+def iter_document(rows, lazy=False, search=False):
+    """
+    Yield the page as head, one chunk per accordion item, then footer.
+    With `lazy`, items have empty bodies and the bodies follow as one
+    JSON payload (see utils.lazy_accordion). With `search`, an index
+    over titles and descriptions follows (see utils.search_index).
+    """
     accordion_id = "accordionMaster"
 
-    accordion_items = []
-    for idx, (title, text) in enumerate(rows, start=1):
-        accordion_items.append(
-            build_accordion_item(title, text, idx, accordion_id)
-        )
+    yield document_head(accordion_id)
 
+    if not lazy:
+        for idx, event in enumerate(rows, start=1):
+            yield build_accordion_item(*shown(event), idx, accordion_id)
+    else:
+        yield NOSCRIPT
+        for idx, event in enumerate(rows, start=1):
+            yield lazy_item(shown(event)[0], idx, accordion_id)
+        yield from iter_payload(html.escape(shown(event)[1].strip()) for event in rows)
+
+    if search:
+        yield from iter_search(build_index((i, None, " ".join(shown(event))) for i, event in enumerate(rows)))
+
+    yield DOCUMENT_TAIL
+
+def document_head(accordion_id):
     return f"""
 <!DOCTYPE html>
 <html>
@@ -109,7 +187,9 @@ def generate_full_html(excel_path):
 <body style="padding: 1px;">
 
     <div class="accordion" id="{accordion_id}">
-        {''.join(accordion_items)}
+        """
+
+DOCUMENT_TAIL = """
     </div>
 
     <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.3.2/dist/js/bootstrap.bundle.min.js"></script>
@@ -122,11 +202,11 @@ def generate_full_html(excel_path):
 # ---------------------------------------------------------
 # Public run() function for Streamlit integration
 # ---------------------------------------------------------
-def run(input_path, original_name):
-    output_path = build_output_filename(original_name, ".html")
-    html_output = generate_full_html(input_path)
-
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write(html_output)
+def run(input_path, original_name, lazy=False, search=False):
+    with instrument("social", original_name) as progress:
+        rows = load(input_path, progress)
+        # Rendering and writing are one streamed pass here
+        report(progress, "write", rows=len(rows))
+        output_path = write_output(iter_document(rows, lazy, search), original_name)
 
     return output_path
@@ -1,88 +1,477 @@
+import io
+import json
+import math
 import os
-import shutil
+import time
+import uuid
+import zipfile
+from contextlib import closing
+from functools import partial
 import streamlit as st
-from processors.registry import SCRIPTS
-from utils.file_io import save_uploaded_file
+from processors.registry import SCRIPTS, run_all
+from processors.batch import convert_source, iter_pool, spawn_context
+from processors.records import EXPORTERS
+from utils.render_cache import get_cache, make_key
+from utils.file_io import add_to_archive, unique_name
+from utils.jobs import get_job_manager, report
+from utils.instrument import instrument, enable_json_logs
+from utils.optimize import optimize as optimize_html, size_report
+from utils.preflight import preflight
 import streamlit.components.v1 as components
 
-TEMP_DIR = "temp"
+# Renders run in memory, so a session needs no files; its id keys its background job
+if "session_id" not in st.session_state:
+    st.session_state["session_id"] = uuid.uuid4().hex
 
-# Clean up previous run’s temp files
-if os.path.exists(TEMP_DIR):
-    shutil.rmtree(TEMP_DIR)
+# Per-stage timing/memory records go to the server log as JSON lines
+enable_json_logs()
 
 st.title("Excel → HTML Processing Tool")
 
-uploaded = st.file_uploader("Upload Excel file", type=["xlsx"])
+uploads = st.file_uploader("Upload Excel file(s)", type=["xlsx"], accept_multiple_files=True) or []
 
-script_choice = st.selectbox("Choose script", list(SCRIPTS.keys()))
-script_info = SCRIPTS[script_choice]
+# One workbook: single script or run all; several: each one through the chosen processors
+uploaded = uploads[0] if len(uploads) == 1 else None
+if len(uploads) > 1:
+    mode = "Many workbooks"
+else:
+    mode = st.radio("Mode", ["Single script", "Run all"], horizontal=True)
 
-target_filename = None
-if script_info["needs_target"]:
-    target_filename = st.text_input("Enter target filename")
+cache_stats = get_cache().stats()
+st.sidebar.caption(
+    f"Render cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses, "
+    f"{cache_stats['entries']} entries ({cache_stats['bytes'] / 1024:.0f} KB)"
+)
+# Also turns on tracemalloc for the next run, which makes it slower
+st.sidebar.checkbox("Show diagnostics", key="show_diagnostics")
 
-if uploaded and st.button("Run"):
-    input_path = save_uploaded_file(uploaded)
-    original_name = uploaded.name  
 
-    func = script_info["func"]
+# Source view pages, and the size above which the preview waits to be asked for
+SOURCE_PAGE_LINES = 300
+LARGE_PREVIEW_BYTES = 1024 * 1024
+
+
+def copy_button_html(html_content, label="Copy HTML to Clipboard"):
+    # JSON keeps quotes/backticks intact; "<\/" stops the payload closing the script tag
+    payload = json.dumps(html_content).replace("</", "<\\/")
+    return f"""
+        <script>const payload = {payload};</script>
+        <button onclick="navigator.clipboard.writeText(payload)"
+                style="
+                    background-color:#4CAF50;
+                    color:white;
+                    padding:8px 14px;
+                    border:none;
+                    border-radius:4px;
+                    cursor:pointer;
+                    font-size:14px;
+                    margin-bottom:10px;
+                ">
+            {label}
+        </button>
+    """
+
+
+def show_diagnostics(record):
+    st.subheader("Diagnostics")
+    st.caption(f"{record['processor']} on {record['source']}: {record['seconds']:.3f}s total"
+               + (f", {record['peak_mb']:.1f} MB peak" if record["peak_mb"] is not None else ""))
+    st.table([
+        {"stage": stage, "seconds": values["seconds"], "rows": values["rows"], "peak MB": values["peak_mb"]}
+        for stage, values in record["stages"].items()
+    ])
+    st.json(record, expanded=False)
+
+
+# Download types for the precompressed siblings
+ARTIFACT_MIME = {".html": "text/html", ".gz": "application/gzip", ".br": "application/x-brotli"}
 
-    if script_info["needs_target"]:
-        output_path = func(input_path, original_name, target_filename)
-    else:
-        output_path = func(input_path, original_name)
 
-    # Read generated HTML
-    with open(output_path, "r", encoding="utf-8") as f:
-        html_content = f.read()
+def show_result(html_content, file_name, key, diagnostics=None, artifacts=None):
+    size_bytes = len(html_content.encode("utf-8"))
+    size_kb = size_bytes / 1024
 
     # -------------------------
-    # TABBED UI
+    # VIEW SWITCHER: only the selected view is sent to the browser
     # -------------------------
-    tab_preview, tab_html, tab_download = st.tabs(["Preview", "HTML", "Download"])
+    views = ["Preview", "HTML", "Download"]
+    if diagnostics and st.session_state.get("show_diagnostics"):
+        views.append("Diagnostics")
+    view = st.radio("View", views, horizontal=True, key=f"view_{key}")
 
     # -------------------------
-    # 1. PREVIEW TAB
+    # 1. PREVIEW
     # -------------------------
-    with tab_preview:
+    if view == "Preview":
         st.subheader("Live Preview")
-        components.html(html_content, height=600, scrolling=True)
+        if size_bytes <= LARGE_PREVIEW_BYTES or st.checkbox(
+            f"Render full preview ({size_kb:,.0f} KB)", key=f"full_preview_{key}"
+        ):
+            components.html(html_content, height=600, scrolling=True)
 
     # -------------------------
-    # 2. HTML TAB (copy button + code block)
+    # 2. HTML (paged source + on-demand copy button)
     # -------------------------
-    with tab_html:
+    elif view == "HTML":
         st.subheader("HTML Source")
 
-        copy_button = f"""
-            <button onclick="navigator.clipboard.writeText(`{html_content}`)"
-                    style="
-                        background-color:#4CAF50;
-                        color:white;
-                        padding:8px 14px;
-                        border:none;
-                        border-radius:4px;
-                        cursor:pointer;
-                        font-size:14px;
-                        margin-bottom:10px;
-                    ">
-                Copy HTML to Clipboard
-            </button>
-        """
-        components.html(copy_button, height=60)
-
-        st.code(html_content, language="html")
+        lines = html_content.splitlines()
+        pages = max(1, math.ceil(len(lines) / SOURCE_PAGE_LINES))
+        page = 1
+        if pages > 1:
+            page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, key=f"page_{key}")
+        start = (page - 1) * SOURCE_PAGE_LINES
+
+        # The copy payload is sent inline, so only send it when asked, and never a large document
+        if size_bytes <= LARGE_PREVIEW_BYTES:
+            if st.checkbox("Show copy button", key=f"copy_{key}"):
+                components.html(copy_button_html(html_content), height=60)
+        else:
+            st.caption(f"At {size_kb:,.0f} KB this is too large to copy in one go: use Download, "
+                       "or copy it a page at a time.")
+            page_text = "\n".join(lines[start:start + SOURCE_PAGE_LINES]) + "\n"
+            components.html(copy_button_html(page_text, f"Copy page {page} to Clipboard"), height=60)
+
+        st.caption(f"Lines {start + 1}–{min(start + SOURCE_PAGE_LINES, len(lines))} of {len(lines)}, {size_kb:,.0f} KB")
+        st.code("\n".join(lines[start:start + SOURCE_PAGE_LINES]), language="html")
+
+    # -------------------------
+    # DIAGNOSTICS (per-stage time / rows / memory of the run)
+    # -------------------------
+    elif view == "Diagnostics":
+        show_diagnostics(diagnostics)
 
     # -------------------------
-    # 3. DOWNLOAD TAB
+    # 3. DOWNLOAD
     # -------------------------
-    with tab_download:
+    else:
         st.subheader("Download HTML File")
-        with open(output_path, "rb") as f:
+        if artifacts is None:
             st.download_button(
                 label="Download HTML Output",
-                data=f,
-                file_name=os.path.basename(output_path),
-                mime="text/html"
-            )
\ No newline at end of file
+                data=html_content.encode("utf-8"),
+                file_name=file_name,
+                mime="text/html",
+                key=f"download_{key}"
+            )
+        else:
+            # Minified HTML plus .gz/.br siblings for a static host
+            st.caption(size_report(artifacts["sizes"]))
+            for name, content in artifacts["files"].items():
+                st.download_button(
+                    label=f"Download {name} ({len(content) / 1024:,.0f} KB)",
+                    data=content,
+                    file_name=name,
+                    mime=ARTIFACT_MIME[os.path.splitext(name)[1]],
+                    key=f"download_{key}_{name}"
+                )
+
+
+# Results live in session state so switching views (a rerun) doesn't lose them
+if not uploaded:
+    st.session_state.pop("single_result", None)
+    st.session_state.pop("batch_result", None)
+if len(uploads) < 2:
+    st.session_state.pop("many_result", None)
+
+
+# -------------------------
+# JOBS: rendering runs on the shared worker pool, not in the script run
+# -------------------------
+def render_single(data, original_name, script_choice, target_filename, lazy=False, search=False, optimize=False,
+                  trace_memory=False, progress=None):
+    script_info = SCRIPTS[script_choice]
+    lazy = lazy and script_info["lazy"]
+    search = search and script_info["search"]
+
+    # Same bytes + same script version → reuse the stored HTML
+    cache = get_cache()
+    cache_name = script_choice
+    if script_info["needs_target"]:
+        cache_name = f"{script_choice}|{target_filename}"
+    if lazy:
+        cache_name += "|lazy"
+    if search:
+        cache_name += "|search"
+    cache_key = make_key(data, cache_name, script_info["version"])
+
+    html_content = cache.get(cache_key)
+    from_cache = html_content is not None
+    diagnostics = None
+
+    if not from_cache:
+        # Render straight from the uploaded bytes; nothing is staged in temp/
+        render = script_info["render"]
+
+        options = {}
+        if lazy:
+            options["lazy"] = True
+        if search:
+            options["search"] = True
+
+        with instrument(script_info["slug"], original_name, forward=progress, trace_memory=trace_memory) as recorder:
+            if script_info["needs_target"]:
+                html_content = render(data, target_filename, progress=recorder, **options)
+            else:
+                html_content = render(data, progress=recorder, **options)
+
+            report(recorder, "write")
+            cache.put(cache_key, html_content)
+        diagnostics = recorder.record
+
+    # The cache keeps the plain render; minifying is cheap next to rendering
+    file_name = os.path.splitext(original_name)[0] + ".html"
+    artifacts = None
+    if optimize:
+        artifacts = optimize_html(html_content, file_name)
+        html_content = artifacts["html"]
+
+    return {
+        "html": html_content,
+        "file_name": file_name,
+        "from_cache": from_cache,
+        "diagnostics": diagnostics,
+        "artifacts": artifacts,
+    }
+
+
+def render_batch(data, original_name, names=None, lazy=False, search=False, optimize=False, exports=(),
+                 trace_memory=False, progress=None):
+    with instrument("run_all", original_name, forward=progress, trace_memory=trace_memory) as recorder:
+        results, archive = run_all(data, original_name, names, progress=recorder, lazy=lazy, search=search,
+                                   optimize=optimize, exports=exports)
+    return {
+        "results": results,
+        "archive": archive,
+        "archive_name": os.path.splitext(original_name)[0] + ".zip",
+        "diagnostics": recorder.record,
+    }
+
+
+def render_many(files, names, lazy=False, search=False, optimize=False, exports=(), trace_memory=False,
+                progress=None):
+    """
+    Convert several workbooks ([(name, bytes)]) in parallel, one per worker
+    process. Outputs go into the ZIP as each workbook finishes; nothing is
+    staged on disk. A workbook that fails is reported and the rest go on.
+    """
+    report(progress, "read")
+    buffer = io.BytesIO()
+    taken = set()
+    summary = []
+
+    convert = partial(convert_source, names=names, lazy=lazy, search=search, optimize=optimize, exports=exports)
+    calls = [(data, name) for name, data in files]
+
+    report(progress, "render")
+    with zipfile.ZipFile(buffer, "w") as zf, \
+            closing(iter_pool(convert, calls, names, log_json=True, trace_memory=trace_memory,
+                              mp_context=spawn_context())) as converted:
+        for (_, source_name), result, error in converted:
+            if error is not None:
+                summary.append({"source": source_name, "files": [], "reports": {},
+                                "errors": {"workbook": f"{type(error).__name__}: {error}"}})
+            else:
+                entry = {"source": source_name, "files": [], "reports": {}, "errors": result["errors"]}
+                for output in result["outputs"]:
+                    # Two uploads can share a name (same workbook from two folders): Book_social_1.html, ...
+                    main_name = unique_name(output["file_name"], taken)
+                    stem = os.path.splitext(output["file_name"])[0]
+                    for file_name, content in output["files"].items():
+                        # Siblings follow the main file's name, e.g. Book_social_1.html.gz, Book_social_1.json
+                        archive_name = os.path.splitext(main_name)[0] + file_name[len(stem):]
+                        taken.add(archive_name)
+                        add_to_archive(zf, archive_name, content)
+                        entry["files"].append(archive_name)
+                    if output["sizes"]:
+                        entry["reports"][main_name] = size_report(output["sizes"])
+                summary.append(entry)
+
+            # Between workbooks: a cancelled job stops here, and the workbooks not yet started are dropped
+            report(progress, "render")
+
+    report(progress, "write")
+    written = any(entry["files"] for entry in summary)
+    return {
+        "summary": summary,
+        "archive": buffer.getvalue() if written else None,
+        "archive_name": "workbooks.zip",
+    }
+
+
+jobs = get_job_manager()
+session_id = st.session_state["session_id"]
+
+LAZY_LABEL = "Load accordion bodies on demand"
+LAZY_HELP = "For very large pages: each body is filled in the first time it is opened."
+SEARCH_LABEL = "Add a search box"
+SEARCH_HELP = "Embeds a small index of titles, dates and descriptions, so searching the page is instant."
+EXPORTS_LABEL = "Also export"
+EXPORTS_HELP = "Written next to each page from the same parsed rows, where the output offers the format."
+OPTIMIZE_LABEL = "Minify and precompress (.gz/.br)"
+OPTIMIZE_HELP = "Smaller HTML with the same rendering, plus precompressed copies for a static host."
+
+# -------------------------
+# PRE-FLIGHT: sheets/columns checked from the header rows only, in milliseconds,
+# so a wrong workbook is turned away before any job starts
+# -------------------------
+schema = {}
+if uploaded:
+    try:
+        schema = preflight(uploaded.getvalue(), SCRIPTS)
+    except Exception as e:
+        st.error(f"Could not read {uploaded.name} as an Excel workbook: {e}")
+        uploaded = None
+
+if mode == "Single script":
+    script_choice = st.selectbox("Choose script", list(SCRIPTS.keys()))
+    script_info = SCRIPTS[script_choice]
+
+    target_filename = None
+    if script_info["needs_target"]:
+        target_filename = st.text_input("Enter target filename")
+
+    lazy = False
+    if script_info["lazy"]:
+        lazy = st.checkbox(LAZY_LABEL, help=LAZY_HELP)
+    search = False
+    if script_info["search"]:
+        search = st.checkbox(SEARCH_LABEL, help=SEARCH_HELP)
+    optimize = st.checkbox(OPTIMIZE_LABEL, help=OPTIMIZE_HELP)
+
+    problems = schema.get(script_choice)
+    if problems:
+        st.error(f"{script_choice} can't run on {uploaded.name}:\n\n" + "\n\n".join(problems))
+
+    if uploaded and st.button("Run", disabled=bool(problems)):
+        st.session_state.pop("single_result", None)
+        jobs.submit(session_id, ("single_result", script_choice), render_single,
+                    uploaded.getvalue(), uploaded.name, script_choice, target_filename,
+                    lazy=lazy, search=search, optimize=optimize,
+                    trace_memory=st.session_state.get("show_diagnostics", False))
+
+# -------------------------
+# RUN ALL: one workbook load, every script
+# -------------------------
+elif mode == "Run all":
+    lazy = st.checkbox(LAZY_LABEL, help=LAZY_HELP)
+    search = st.checkbox(SEARCH_LABEL, help=SEARCH_HELP)
+    optimize = st.checkbox(OPTIMIZE_LABEL, help=OPTIMIZE_HELP)
+    exports = st.multiselect(EXPORTS_LABEL, list(EXPORTERS), help=EXPORTS_HELP)
+
+    runnable = [name for name, problems in schema.items() if not problems]
+    if uploaded:
+        if runnable:
+            st.caption(f"Can run: {', '.join(runnable)}")
+        for name, problems in schema.items():
+            if problems:
+                st.warning(f"{name} will be skipped: " + "; ".join(problems))
+
+    if uploaded and st.button("Run all", disabled=not runnable):
+        st.session_state.pop("batch_result", None)
+        jobs.submit(session_id, ("batch_result", "Run all"), render_batch,
+                    uploaded.getvalue(), uploaded.name, runnable, lazy=lazy, search=search, optimize=optimize, exports=exports,
+                    trace_memory=st.session_state.get("show_diagnostics", False))
+
+# -------------------------
+# MANY WORKBOOKS: parallel conversion, every output in one ZIP
+# -------------------------
+else:
+    names = st.multiselect("Processors", list(SCRIPTS), default=list(SCRIPTS))
+    lazy = st.checkbox(LAZY_LABEL, help=LAZY_HELP)
+    search = st.checkbox(SEARCH_LABEL, help=SEARCH_HELP)
+    optimize = st.checkbox(OPTIMIZE_LABEL, help=OPTIMIZE_HELP)
+    exports = st.multiselect(EXPORTS_LABEL, list(EXPORTERS), help=EXPORTS_HELP)
+
+    if st.button(f"Convert {len(uploads)} workbooks", disabled=not names):
+        st.session_state.pop("many_result", None)
+        files = [(upload.name, upload.getvalue()) for upload in uploads]
+        jobs.submit(session_id, ("many_result", f"{len(uploads)} workbooks"), render_many,
+                    files, names, lazy=lazy, search=search, optimize=optimize, exports=exports,
+                    trace_memory=st.session_state.get("show_diagnostics", False))
+
+# -------------------------
+# JOB STATUS: progress bar + cancel while running, collect the result when done
+# -------------------------
+job = jobs.get(session_id)
+if job is not None:
+    result_key, job_name = job.label
+
+    if not job.done:
+        st.progress(job.fraction, text=f"{job_name}: {job.stage or 'queued'}…")
+        if st.button("Cancel", help="Rendering stops at once; reading the workbook finishes first"):
+            job.cancel()
+        else:
+            time.sleep(0.3)
+            st.rerun()
+    else:
+        jobs.pop(session_id)
+        if job.status == "done":
+            st.session_state[result_key] = job.result
+        elif job.status == "failed":
+            st.error(f"{job_name} failed: {job.error}")
+        else:
+            st.warning(f"{job_name} was cancelled")
+
+# -------------------------
+# RESULTS
+# -------------------------
+if mode == "Single script":
+    result = st.session_state.get("single_result")
+    if result:
+        if result["from_cache"]:
+            st.caption("Loaded from render cache")
+        show_result(result["html"], result["file_name"], key="single", diagnostics=result["diagnostics"],
+                    artifacts=result["artifacts"])
+
+elif mode == "Run all":
+    batch = st.session_state.get("batch_result")
+    if batch:
+        results = batch["results"]
+
+        st.subheader("Results")
+        for name, result in results.items():
+            if result["error"] is None:
+                st.success(f"{name}: {result['file_name']}")
+                if result["exports"]:
+                    st.caption("Exported: " + ", ".join(result["exports"]))
+                if result.get("artifacts"):
+                    st.caption(size_report(result["artifacts"]["sizes"]))
+            else:
+                st.error(f"{name}: {result['error']}")
+
+        if batch["archive"]:
+            st.download_button(
+                label="Download All (ZIP)",
+                data=batch["archive"],
+                file_name=batch["archive_name"],
+                mime="application/zip"
+            )
+
+        done = [name for name, result in results.items() if result["error"] is None]
+        if done:
+            # One output at a time, rather than a tab per output all rendered at once
+            name = st.selectbox("Show output", done, key="batch_output")
+            show_result(results[name]["html"], results[name]["file_name"], key=f"batch_{results[name]['file_name']}",
+                        diagnostics=batch["diagnostics"], artifacts=results[name].get("artifacts"))
+
+else:
+    many = st.session_state.get("many_result")
+    if many:
+        st.subheader("Results")
+        for entry in many["summary"]:
+            if entry["errors"]:
+                lines = [f"{name}: {message}" for name, message in entry["errors"].items()]
+                st.error(f"{entry['source']}:\n\n" + "\n\n".join(lines))
+            if entry["files"]:
+                st.success(f"{entry['source']}: {len(entry['files'])} file(s)")
+            for file_name, line in entry["reports"].items():
+                st.caption(f"{file_name}: {line}")
+
+        if many["archive"]:
+            st.download_button(
+                label="Download All (ZIP)",
+                data=many["archive"],
+                file_name=many["archive_name"],
+                mime="application/zip"
+            )
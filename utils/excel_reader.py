@@ -0,0 +1,127 @@
+import io
+import itertools
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+
+def open_workbook(source):
+    """
+    Open a workbook in streaming (read-only) mode.
+    `source` can be a path, the raw .xlsx bytes, or a binary file object.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    return load_workbook(source, read_only=True, data_only=True)
+
+
+def _convert_cell(value):
+    # Same rule pandas' openpyxl reader uses: whole floats come back as int
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _sheet_rows(ws, sheet_name, columns, defaults, strict=True):
+    # Some writers store a wrong sheet size; don't trust it
+    ws.reset_dimensions()
+
+    rows = ws.iter_rows(values_only=True)
+    header = list(next(rows, ()))
+
+    missing = [c for c in columns if c not in header and c not in defaults]
+    if missing and strict:
+        raise KeyError(f"Sheet '{sheet_name}' has no column(s): {', '.join(missing)}")
+    columns = [c for c in columns if c not in missing]
+
+    positions = [header.index(c) if c in header else None for c in columns]
+    blank = tuple(defaults[c] if i is None else None for c, i in zip(columns, positions))
+
+    yield columns
+
+    blank_run = 0
+    for row in rows:
+        if all(v is None for v in row):
+            blank_run += 1
+            continue
+
+        values = tuple(
+            defaults[c] if i is None
+            else (_convert_cell(row[i]) if i < len(row) else None)
+            for c, i in zip(columns, positions)
+        )
+
+        # Blank rows only count once we know they're not trailing
+        for _ in range(blank_run):
+            yield blank
+        blank_run = 0
+
+        yield values
+
+
+def _to_frame(rows, columns):
+    df = pd.DataFrame.from_records(rows, columns=list(columns))
+    # Empty cells read as NaN, matching pd.read_excel
+    return df.fillna(np.nan)
+
+
+def iter_rows(source, sheet_name, columns, defaults=None):
+    """
+    Stream the data rows of one sheet, keeping only the requested columns.
+
+    Yields one tuple per row, in the order of `columns`, holding the cell
+    values as openpyxl types them (str, int, float, datetime, bool or None).
+    A column missing from the header row raises KeyError unless it has an
+    entry in `defaults`, in which case every row gets that value.
+    Trailing blank rows are dropped, like pd.read_excel does.
+    """
+    wb = open_workbook(source)
+    try:
+        rows = _sheet_rows(wb[sheet_name], sheet_name, columns, defaults or {})
+        next(rows)
+        yield from rows
+    finally:
+        wb.close()
+
+
+def read_frame(source, sheet_name, columns, defaults=None):
+    """Load only the requested columns of a sheet into a DataFrame."""
+    return _to_frame(iter_rows(source, sheet_name, columns, defaults), columns)
+
+
+def iter_frames(source, sheet_name, columns, defaults=None, rows_per_frame=50000):
+    """
+    read_frame() in pieces of up to `rows_per_frame` rows, for sheets too
+    big to hold at once. Only one piece is in memory at a time.
+    """
+    rows = iter_rows(source, sheet_name, columns, defaults)
+    while True:
+        piece = list(itertools.islice(rows, rows_per_frame))
+        if not piece:
+            return
+        yield _to_frame(piece, columns)
+
+
+def read_sheets(source, wanted):
+    """
+    Open the workbook once and load several sheets from it.
+
+    `wanted` maps sheet name to (columns, defaults). Returns a dict of
+    sheet name to DataFrame. Sheets the workbook doesn't have are left
+    out, and so are requested columns missing from a sheet's header, so
+    each caller can report its own missing sheet or column.
+    """
+    frames = {}
+
+    wb = open_workbook(source)
+    try:
+        for sheet_name, (columns, defaults) in wanted.items():
+            if sheet_name not in wb.sheetnames:
+                continue
+            rows = _sheet_rows(wb[sheet_name], sheet_name, columns, defaults or {}, strict=False)
+            found = next(rows)
+            frames[sheet_name] = _to_frame(rows, found)
+    finally:
+        wb.close()
+
+    return frames
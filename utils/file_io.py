@@ -1,32 +1,121 @@
+import io
 import os
+import threading
 import uuid
+import zipfile
 
 TEMP_DIR = "temp"
 
-def ensure_temp_dir():
-    if not os.path.exists(TEMP_DIR):
-        os.makedirs(TEMP_DIR)
+def ensure_temp_dir(directory=TEMP_DIR):
+    os.makedirs(directory, exist_ok=True)
 
-def save_uploaded_file(uploaded_file):
-    ensure_temp_dir()
-    temp_name = os.path.join(TEMP_DIR, f"uploaded_{uuid.uuid4().hex}.xlsx")
+def save_uploaded_file(uploaded_file, directory=TEMP_DIR):
+    ensure_temp_dir(directory)
+    temp_name = os.path.join(directory, f"uploaded_{uuid.uuid4().hex}.xlsx")
     with open(temp_name, "wb") as f:
         f.write(uploaded_file.read())
     return temp_name
 
-def build_output_filename(original_name, extension=".html"):
+_name_counters = {}
+_name_lock = threading.Lock()
+
+def build_output_filename(original_name, extension=".html", directory=TEMP_DIR):
     """
-    Creates a collision-safe output filename inside temp/.
+    Creates a collision-safe output filename inside temp/ (or `directory`).
     Example: SocialList.html, SocialList_1.html, SocialList_2.html
+
+    The name is reserved by creating the file with O_EXCL, so two sessions
+    (or processes) can never be handed the same path. A per-base counter
+    remembers the next suffix, so earlier outputs aren't re-probed each time.
     """
-    ensure_temp_dir()
+    ensure_temp_dir(directory)
 
     base, _ = os.path.splitext(original_name)
-    candidate = os.path.join(TEMP_DIR, base + extension)
+    key = (os.path.abspath(directory), base, extension)
+
+    while True:
+        with _name_lock:
+            counter = _name_counters.get(key, 0)
+            _name_counters[key] = counter + 1
+
+        if counter == 0:
+            candidate = os.path.join(directory, base + extension)
+        else:
+            candidate = os.path.join(directory, f"{base}_{counter}{extension}")
+
+        try:
+            # 0o666 & umask, like open() would give
+            fd = os.open(candidate, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666)
+        except FileExistsError:
+            # Left over from an earlier process, or taken by another one
+            continue
+        os.close(fd)
+        return candidate
 
-    counter = 1
-    while os.path.exists(candidate):
-        candidate = os.path.join(TEMP_DIR, f"{base}_{counter}{extension}")
+def write_chunks(chunks, output_path):
+    """
+    Writes an iterable of text chunks to output_path as they arrive,
+    so the whole document never has to sit in memory at once.
+    """
+    with open(output_path, "w", encoding="utf-8") as f:
+        for chunk in chunks:
+            f.write(chunk)
+    return output_path
+
+def write_atomic(target, content):
+    """
+    Write text or bytes to `target`, replacing it in one step, so readers
+    never see a half-written file. Parent directories are created.
+    """
+    os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+    temp = f"{target}.{uuid.uuid4().hex}.tmp"
+    if isinstance(content, str):
+        with open(temp, "w", encoding="utf-8") as f:
+            f.write(content)
+    else:
+        with open(temp, "wb") as f:
+            f.write(content)
+    os.replace(temp, target)
+
+def unique_name(file_name, taken):
+    """`file_name`, or file_name_1, _2, ... if it is in `taken`; the result is added to `taken`."""
+    base, ext = os.path.splitext(file_name)
+    candidate, counter = file_name, 0
+    while candidate in taken:
         counter += 1
+        candidate = f"{base}_{counter}{ext}"
+    taken.add(candidate)
+    return candidate
+
+def write_output(chunks, original_name, extension=".html", directory=TEMP_DIR):
+    """
+    Reserve an output name (see build_output_filename) and write `chunks`
+    to it. If producing the chunks fails, the file is removed again, so a
+    failed run leaves nothing behind. Returns the path.
+    """
+    output_path = build_output_filename(original_name, extension, directory)
+    try:
+        return write_chunks(chunks, output_path)
+    except BaseException:
+        os.remove(output_path)
+        raise
+
 
-    return candidate
\ No newline at end of file
+def add_to_archive(zf, file_name, content):
+    """Write one text or bytes entry into an open ZipFile."""
+    if isinstance(content, str):
+        zf.writestr(file_name, content.encode("utf-8"), compress_type=zipfile.ZIP_DEFLATED)
+    else:
+        # Already compressed (.gz/.br): deflating again only costs time
+        zf.writestr(file_name, content, compress_type=zipfile.ZIP_STORED)
+
+
+def build_archive(files):
+    """
+    Zips {file_name: text or bytes} into an in-memory archive and returns its bytes.
+    """
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for file_name, content in files.items():
+            add_to_archive(zf, file_name, content)
+    return buffer.getvalue()
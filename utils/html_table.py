@@ -0,0 +1,82 @@
+import html
+import math
+import numpy as np
+import pandas as pd
+
+# Rows joined per chunk when a table is streamed
+CHUNK_ROWS = 5000
+
+# Same replacements as html.escape(), "&" first
+_ESCAPES = [("&", "&amp;"), ("<", "&lt;"), (">", "&gt;"), ('"', "&quot;"), ("'", "&#x27;")]
+
+
+# ---------------------------------------------------------
+# Cells: fill, stringify, strip and escape whole columns
+# ---------------------------------------------------------
+def escape_column(col):
+    """html.escape() applied to a column of strings at once."""
+    for char, entity in _ESCAPES:
+        if col.str.contains(char, regex=False).any():
+            col = col.str.replace(char, entity, regex=False)
+    return col
+
+
+def clean_cells(df, fills):
+    """
+    The columns named in `fills` (in that order) as escaped, stripped
+    strings. `fills` maps each column to the text a missing cell gets.
+    """
+    cells = pd.DataFrame(index=df.index)
+    for name, fill in fills.items():
+        col = df[name].fillna(fill).astype(str).str.strip()
+        cells[name] = escape_column(col)
+    return cells
+
+
+# ---------------------------------------------------------
+# Layout: items fill the table column by column ("snake" order)
+# ---------------------------------------------------------
+def table_rows(cells, num_columns):
+    """
+    One "<td>..</td>" string per table row, as an object array. Item i
+    goes to column i // rows, row i % rows; missing slots are empty cells.
+    """
+    total = len(cells)
+    rows = math.ceil(total / num_columns)
+
+    items = None
+    for name in cells.columns:
+        cell = "<td>" + cells[name] + "</td>"
+        items = cell if items is None else items + cell
+
+    grid = np.full(rows * num_columns, "<td></td>" * len(cells.columns), dtype=object)
+    if total:
+        grid[:total] = items.to_numpy(dtype=object)
+
+    # grid[k, r] is column k, row r; add the columns of each row together
+    grid = grid.reshape(num_columns, rows)
+    return np.add.reduce(grid, axis=0)
+
+
+def iter_table(cells, num_columns, style, table_class="eight-col"):
+    """
+    Yield `style`, then the table: a header with the cell column names
+    repeated `num_columns` times, then the rows, CHUNK_ROWS at a time.
+    """
+    yield style
+    yield f'\n<table class="{table_class}">\n  <tr>\n'
+
+    header = "".join(f"<th>{html.escape(str(name))}</th>" for name in cells.columns)
+    for _ in range(num_columns):
+        yield "    " + header
+    yield "  </tr>\n"
+
+    lines = table_rows(cells, num_columns)
+    for start in range(0, len(lines), CHUNK_ROWS):
+        yield "".join("  <tr>" + lines[start:start + CHUNK_ROWS] + "</tr>\n")
+
+    yield "</table>"
+
+
+def render_table(cells, num_columns, style, table_class="eight-col"):
+    return "".join(iter_table(cells, num_columns, style, table_class))
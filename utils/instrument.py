@@ -0,0 +1,134 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+from utils.jobs import cancelled
+
+logger = logging.getLogger("pioneerhtml.diagnostics")
+
+# tracemalloc makes a run several times slower, so memory peaks are opt-in
+# (PIONEER_TRACE_MEMORY=1, or trace_memory=True per run); wall time and rows are always kept
+TRACE_MEMORY = os.environ.get("PIONEER_TRACE_MEMORY", "0") == "1"
+
+# Last few records, for the app's Diagnostics view
+RECENT = deque(maxlen=50)
+
+# tracemalloc is process-wide: start it with the first recorder, stop it with the last
+_tracing_users = 0
+_tracing_lock = threading.Lock()
+
+
+def _start_tracing():
+    global _tracing_users
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _tracing_users += 1
+
+
+def _stop_tracing():
+    global _tracing_users
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0 and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+class StageRecorder:
+    """
+    A progress callback that records each stage: wall time, rows and
+    tracemalloc peak.
+
+    Pass it as `progress=` to a processor. When another callback is
+    wrapped with `forward` (e.g. a Job's), every stage report is passed
+    on to it too, and so is asking whether it was cancelled. Peaks are process-wide, so
+    jobs running at the same time show up in each other's numbers.
+    """
+
+    def __init__(self, processor, source_name=None, trace_memory=None, forward=None):
+        self.processor = processor
+        self.source_name = source_name
+        self.trace_memory = TRACE_MEMORY if trace_memory is None else trace_memory
+        self.forward = forward
+
+        self.stages = {}
+        self.record = None
+        self._current = None
+        self._started = time.perf_counter()
+
+        if self.trace_memory:
+            _start_tracing()
+            tracemalloc.reset_peak()
+
+    def __call__(self, stage, rows=None):
+        if self.forward is not None:
+            self.forward(stage, rows)
+        self._close_stage()
+        self._current = stage
+        self.stages[stage] = {"seconds": None, "rows": rows, "peak_mb": None, "_t": time.perf_counter()}
+
+    def cancelled(self):
+        return cancelled(self.forward)
+
+    def _close_stage(self):
+        if self._current is None:
+            return
+        values = self.stages[self._current]
+        values["seconds"] = round(time.perf_counter() - values.pop("_t"), 4)
+        if self.trace_memory:
+            values["peak_mb"] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 2)
+            tracemalloc.reset_peak()
+        self._current = None
+
+    def finish(self, error=None):
+        """Close the last stage, log the record as one JSON line and return it."""
+        self._close_stage()
+        if self.trace_memory:
+            _stop_tracing()
+
+        peaks = [v["peak_mb"] for v in self.stages.values() if v["peak_mb"] is not None]
+        self.record = {
+            "processor": self.processor,
+            "source": self.source_name,
+            "finished": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "seconds": round(time.perf_counter() - self._started, 4),
+            "peak_mb": max(peaks) if peaks else None,
+            "error": None if error is None else f"{type(error).__name__}: {error}",
+            "stages": self.stages,
+        }
+
+        RECENT.append(self.record)
+        logger.info(json.dumps(self.record, default=str))
+        return self.record
+
+
+@contextmanager
+def instrument(processor, source_name=None, forward=None, trace_memory=None):
+    """`with instrument("calendar", name) as progress:` - records the stages reported inside the block."""
+    recorder = StageRecorder(processor, source_name, trace_memory=trace_memory, forward=forward)
+    try:
+        yield recorder
+    except BaseException as e:
+        recorder.finish(error=e)
+        raise
+    recorder.finish()
+
+
+def recent_records():
+    return list(RECENT)
+
+
+def enable_json_logs(stream=sys.stderr):
+    """Send the diagnostics records to `stream`, one JSON object per line."""
+    if not any(getattr(h, "_pioneer_json", False) for h in logger.handlers):
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        handler._pioneer_json = True
+        logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
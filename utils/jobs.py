@@ -0,0 +1,184 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Stages every processor reports, in order
+STAGES = ("read", "transform", "render", "write")
+
+# Shared by all sessions; each session runs at most one job at a time
+MAX_WORKERS = min(4, os.cpu_count() or 1)
+
+# Finished jobs whose session never collected them (tab closed, session
+# ended) are dropped after this long, and beyond this many
+FINISHED_MAX_AGE_SECONDS = 10 * 60
+MAX_FINISHED = 16
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def report(progress, stage, rows=None):
+    """
+    Tell `progress` (if any) that `stage` is starting, and how many rows it
+    works on when known. Raises JobCancelled if the job was cancelled.
+    """
+    if progress is not None:
+        progress(stage, rows)
+
+
+def cancelled(progress):
+    """Whether the job behind `progress` was cancelled; callbacks that can tell have a cancelled() method."""
+    check = getattr(progress, "cancelled", None)
+    return check is not None and check()
+
+
+def check_cancelled(progress):
+    """Raise JobCancelled if the job was cancelled, without starting a new stage."""
+    if cancelled(progress):
+        raise JobCancelled()
+
+
+def cancellable(chunks, progress):
+    """Pass `chunks` through, stopping with JobCancelled as soon as the job is cancelled."""
+    for chunk in chunks:
+        check_cancelled(progress)
+        yield chunk
+
+
+class Job:
+    """
+    One piece of work running on the shared pool.
+
+    The job itself is the progress callback handed to the processor.
+    Cancelling sets a flag that the next stage report turns into
+    JobCancelled; renders that stream their output also check it between
+    chunks (see cancellable()), so they stop mid-stage.
+    """
+
+    def __init__(self, session_id, label):
+        self.id = uuid.uuid4().hex
+        self.session_id = session_id
+        self.label = label
+
+        self.status = "queued"
+        self.stage = None
+        self.result = None
+        self.error = None
+        self.submitted = time.time()
+        self.finished = None
+
+        self._cancel = threading.Event()
+        self._future = None
+
+    @property
+    def fraction(self):
+        if self.status == "done":
+            return 1.0
+        if self.stage is None:
+            return 0.0
+        return STAGES.index(self.stage) / len(STAGES)
+
+    @property
+    def done(self):
+        return self.status in ("done", "failed", "cancelled")
+
+    def report(self, stage, rows=None):
+        if self._cancel.is_set():
+            raise JobCancelled()
+        self.stage = stage
+
+    __call__ = report
+
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def cancel(self):
+        self._cancel.set()
+        # Still queued: it never starts
+        if self._future is not None and self._future.cancel():
+            self.status = "cancelled"
+            self.finished = time.time()
+
+    def _run(self, func, args, kwargs):
+        if self._cancel.is_set():
+            self.status = "cancelled"
+            self.finished = time.time()
+            return
+
+        self.status = "running"
+        try:
+            self.result = func(*args, progress=self, **kwargs)
+            self.status = "done"
+        except JobCancelled:
+            self.status = "cancelled"
+        except Exception as e:
+            self.error = e
+            self.status = "failed"
+        finally:
+            self.finished = time.time()
+
+
+class JobManager:
+    """
+    Bounded worker pool plus the current job of each session. A session
+    collects its finished job with pop(); the ones nobody collects are
+    evicted on submit() and get(), after max_age seconds or beyond
+    max_finished of them, oldest first.
+    """
+
+    def __init__(self, max_workers=MAX_WORKERS, max_age=FINISHED_MAX_AGE_SECONDS, max_finished=MAX_FINISHED):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self.max_age = max_age
+        self.max_finished = max_finished
+
+    def _evict(self):
+        # Caller holds the lock
+        now = time.time()
+        finished = sorted((job.finished, session_id) for session_id, job in self._jobs.items()
+                          if job.finished is not None)
+        for i, (finished_at, session_id) in enumerate(finished):
+            if now - finished_at > self.max_age or i < len(finished) - self.max_finished:
+                del self._jobs[session_id]
+
+    def submit(self, session_id, label, func, *args, **kwargs):
+        """
+        Queue func(*args, progress=..., **kwargs) for this session.
+        A job the session already has is cancelled first, so a user can't
+        fill the pool with their own work.
+        """
+        job = Job(session_id, label)
+        with self._lock:
+            self._evict()
+            previous = self._jobs.get(session_id)
+            if previous is not None and not previous.done:
+                previous.cancel()
+            self._jobs[session_id] = job
+            job._future = self._pool.submit(job._run, func, args, kwargs)
+        return job
+
+    def get(self, session_id):
+        with self._lock:
+            self._evict()
+            return self._jobs.get(session_id)
+
+    def pop(self, session_id):
+        with self._lock:
+            return self._jobs.pop(session_id, None)
+
+
+_jobs = None
+_jobs_lock = threading.Lock()
+
+
+def get_job_manager():
+    """Process-wide job manager shared by every session."""
+    global _jobs
+    with _jobs_lock:
+        if _jobs is None:
+            _jobs = JobManager()
+        return _jobs
@@ -0,0 +1,64 @@
+import json
+
+# ---------------------------------------------------------
+# Lazy accordion bodies: items are emitted with empty bodies, and
+# each body's HTML ships in one JSON array that a small inline
+# script unpacks the first time that item is expanded
+# ---------------------------------------------------------
+
+PAYLOAD_ID = "accordionBodies"
+
+LOADER = """
+    <script>
+        // Fill an accordion body from the JSON payload the first time it opens
+        document.addEventListener("show.bs.collapse", function (event) {
+            var payload = document.getElementById("%(payload_id)s");
+            var body = event.target.querySelector(".accordion-body");
+            var index = parseInt(event.target.id.replace("collapse", ""), 10) - 1;
+            if (!payload || !body || body.dataset.loaded) {
+                return;
+            }
+            window.accordionBodies = window.accordionBodies || JSON.parse(payload.textContent);
+            body.innerHTML = window.accordionBodies[index];
+            body.dataset.loaded = "1";
+        });
+    </script>
+""" % {"payload_id": PAYLOAD_ID}
+
+# Bootstrap's collapse needs JavaScript too, so without it no item could open anyway
+NOSCRIPT = """
+        <noscript>
+            <p style="font-family: Arial, sans-serif; padding: 6px;">
+                Turn on JavaScript to see the details of each item.
+            </p>
+        </noscript>
+"""
+
+
+def iter_payload(bodies):
+    """
+    Yield the <script type="application/json"> payload holding `bodies`
+    (HTML strings, in item order), one body per chunk.
+    """
+    yield f'\n    <script type="application/json" id="{PAYLOAD_ID}">['
+    for i, body in enumerate(bodies):
+        # "<\/" keeps a "</script>" inside a body from closing the payload early
+        chunk = json.dumps(body, ensure_ascii=False).replace("</", "<\\/")
+        yield chunk if i == 0 else "," + chunk
+    yield "]</script>\n"
+    yield LOADER
+
+
+def lazy_item(title, index, accordion_id):
+    """One accordion item with an empty body, without the indentation of the full-page markup."""
+    collapse_id = f"collapse{index}"
+    heading_id = f"heading{index}"
+    return (
+        f'<div class="accordion-item custom-accordion-item">'
+        f'<h2 class="accordion-header" id="{heading_id}">'
+        f'<button class="accordion-button custom-accordion-header collapsed" type="button" '
+        f'data-bs-toggle="collapse" data-bs-target="#{collapse_id}" aria-expanded="false" '
+        f'aria-controls="{collapse_id}">{title}</button></h2>'
+        f'<div id="{collapse_id}" class="accordion-collapse collapse" aria-labelledby="{heading_id}" '
+        f'data-bs-parent="#{accordion_id}"><div class="accordion-body custom-accordion-body"></div></div></div>\n'
+    )
@@ -0,0 +1,177 @@
+import difflib
+import io
+import posixpath
+import zipfile
+from xml.etree.ElementTree import iterparse
+
+
+# ---------------------------------------------------------
+# Header-only read: sheet names and first rows, no data rows.
+# openpyxl loads the whole shared-string table when it opens a
+# workbook (seconds on a big sheet), so the .xlsx parts are read
+# directly and only as far as the header rows need.
+# ---------------------------------------------------------
+def _local(tag):
+    # Match on local names: transitional and strict .xlsx use different namespaces
+    return tag.rsplit("}", 1)[-1]
+
+
+def _attr(element, name):
+    for key, value in element.attrib.items():
+        if _local(key) == name:
+            return value
+    return None
+
+
+def _sheet_paths(zf):
+    """[(sheet name, part path)] in workbook order."""
+    targets = {}
+    with zf.open("xl/_rels/workbook.xml.rels") as f:
+        for _, element in iterparse(f):
+            if _local(element.tag) == "Relationship":
+                target = element.get("Target")
+                path = target.lstrip("/") if target.startswith("/") else posixpath.normpath("xl/" + target)
+                targets[element.get("Id")] = path
+
+    sheets = []
+    with zf.open("xl/workbook.xml") as f:
+        for _, element in iterparse(f):
+            if _local(element.tag) == "sheet":
+                sheets.append((element.get("name"), targets[_attr(element, "id")]))
+    return sheets
+
+
+def _first_row(zf, path):
+    """Cells of row 1 as (type, raw value) pairs; parsing stops at the end of that row."""
+    cells = []
+    with zf.open(path) as f:
+        for event, element in iterparse(f, events=("end",)):
+            tag = _local(element.tag)
+            if tag == "c":
+                kind = element.get("t", "n")
+                if kind == "inlineStr":
+                    value = "".join(t.text or "" for t in element.iter() if _local(t.tag) == "t")
+                else:
+                    value = next((v.text for v in element if _local(v.tag) == "v"), None)
+                cells.append((kind, value))
+            elif tag == "row":
+                # No row 1 at all (the sheet starts lower down): empty header
+                return cells if element.get("r", "1") == "1" else []
+            elif tag == "sheetData":
+                break
+    return cells
+
+
+def _shared_strings(zf, count):
+    """The first `count` shared strings; the header's are almost always among the first."""
+    strings = []
+    if count == 0 or "xl/sharedStrings.xml" not in zf.namelist():
+        return strings
+    with zf.open("xl/sharedStrings.xml") as f:
+        for _, element in iterparse(f):
+            if _local(element.tag) != "si":
+                continue
+            # Rich text is several runs; phonetic hints (rPh) aren't part of the value
+            phonetic = {id(t) for r in element if _local(r.tag) == "rPh" for t in r.iter()}
+            strings.append("".join(t.text or "" for t in element.iter()
+                                   if _local(t.tag) == "t" and id(t) not in phonetic))
+            element.clear()
+            if len(strings) >= count:
+                break
+    return strings
+
+
+def _cell_value(kind, value, strings):
+    if value is None:
+        return None
+    if kind == "s":
+        return strings[int(value)]
+    if kind == "n":
+        number = float(value)
+        return int(number) if number.is_integer() else number
+    if kind == "b":
+        return value == "1"
+    return value
+
+
+def _zip_headers(source):
+    with zipfile.ZipFile(source) as zf:
+        rows = [(name, _first_row(zf, path)) for name, path in _sheet_paths(zf)]
+        needed = [int(v) + 1 for _, cells in rows for kind, v in cells if kind == "s" and v is not None]
+        strings = _shared_strings(zf, max(needed, default=0))
+
+    headers = {}
+    for name, cells in rows:
+        values = (_cell_value(kind, value, strings) for kind, value in cells)
+        headers[name] = [value for value in values if value is not None]
+    return headers
+
+
+def _openpyxl_headers(source):
+    from openpyxl import load_workbook
+
+    headers = {}
+    wb = load_workbook(source, read_only=True, data_only=True)
+    try:
+        for ws in wb.worksheets:
+            # Same as the reader: a wrong stored size must not hide the first row
+            ws.reset_dimensions()
+            first = next(ws.iter_rows(max_row=1, values_only=True), ())
+            headers[ws.title] = [cell for cell in first if cell is not None]
+    finally:
+        wb.close()
+    return headers
+
+
+def read_headers(source):
+    """
+    {sheet name: header cells} for every sheet of the workbook.
+    `source` can be a path, the raw .xlsx bytes, or a binary file object.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    try:
+        return _zip_headers(source)
+    except (KeyError, IndexError, ValueError, zipfile.BadZipFile, SyntaxError):
+        # A layout the direct read doesn't know: let openpyxl read it (slower, same result)
+        if hasattr(source, "seek"):
+            source.seek(0)
+        return _openpyxl_headers(source)
+
+
+def _hint(name, options):
+    close = difflib.get_close_matches(str(name).lower(), [str(o).lower() for o in options], n=1, cutoff=0.6)
+    if not close:
+        return ""
+    match = next(o for o in options if str(o).lower() == close[0])
+    return f" (did you mean '{match}'?)"
+
+
+# ---------------------------------------------------------
+# Checks against a processor's declared sheet/columns/defaults
+# ---------------------------------------------------------
+def check_schema(info, headers):
+    """The problems (as messages) keeping processor `info` from running on a workbook with `headers`."""
+    sheet = info["sheet"]
+    if sheet not in headers:
+        return [f"Workbook has no '{sheet}' sheet{_hint(sheet, list(headers))}; "
+                f"sheets: {', '.join(headers) or 'none'}"]
+
+    header = headers[sheet]
+    problems = []
+    for column in info["columns"]:
+        if column not in header and column not in info["defaults"]:
+            problems.append(f"Sheet '{sheet}' has no '{column}' column{_hint(column, header)}")
+    if problems:
+        problems.append(f"Sheet '{sheet}' columns: {', '.join(map(str, header)) or 'none'}")
+    return problems
+
+
+def preflight(source, scripts, names=None):
+    """
+    Check the workbook against several processors from one header read.
+    Returns {name: problems}; an empty list means that processor can run.
+    """
+    headers = read_headers(source)
+    return {name: check_schema(scripts[name], headers) for name in (names or scripts)}
+
@@ -0,0 +1,161 @@
+import hashlib
+import os
+import threading
+import time
+import uuid
+
+CACHE_DIR = os.path.join(".cache", "render")
+
+# Per-section fragments (e.g. one calendar month's table), see get_fragment_cache()
+FRAGMENT_DIR = os.path.join(".cache", "fragments")
+# A 100k-row calendar is about 35 MB of fragments; the cap must hold a whole calendar or every run re-renders
+FRAGMENT_MAX_BYTES = 200 * 1024 * 1024
+
+# Defaults: 200 MB on disk, entries unused for a week are dropped
+MAX_BYTES = 200 * 1024 * 1024
+MAX_AGE_SECONDS = 7 * 24 * 60 * 60
+
+
+def make_key(data, script_name, version):
+    """
+    Cache key for one render: hash of the uploaded bytes + script + script version.
+    Bumping a processor's VERSION is enough to invalidate its old entries.
+    """
+    h = hashlib.sha256()
+    h.update(hashlib.sha256(data).digest())
+    h.update(script_name.encode("utf-8"))
+    h.update(b"\0")
+    h.update(str(version).encode("utf-8"))
+    return h.hexdigest()
+
+
+class RenderCache:
+    """
+    Rendered HTML stored on disk, one file per key.
+
+    A file's mtime is its last use: hits touch it, and eviction removes
+    entries older than max_age first, then the least recently used ones
+    until the cache fits in max_bytes.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=MAX_BYTES, max_age=MAX_AGE_SECONDS):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path_for(self, key):
+        return os.path.join(self.directory, key + ".html")
+
+    def get_path(self, key):
+        """Return the cached file for `key`, or None on a miss."""
+        path = self.path_for(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.max_age:
+                raise FileNotFoundError(path)
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return path
+
+    def get(self, key):
+        """Return the cached HTML for `key`, or None on a miss."""
+        path = self.get_path(key)
+        if path is None:
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    def put(self, key, html, evict=True):
+        """
+        Store HTML under `key` and return its path. Pass evict=False when
+        storing many entries in a row, then call evict() once at the end.
+        """
+        path = self.path_for(key)
+
+        # Write then rename so readers never see half a file
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(html)
+        os.replace(tmp_path, path)
+
+        if evict:
+            self.evict()
+        return path
+
+    def entries(self):
+        found = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".html"):
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                found.append((st.st_mtime, st.st_size, entry.path))
+        return found
+
+    def evict(self):
+        now = time.time()
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+
+        removed = 0
+        for mtime, size, path in entries:
+            if now - mtime <= self.max_age and total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+
+        with self._lock:
+            self.evictions += removed
+
+    def stats(self):
+        entries = self.entries()
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(entries),
+                "bytes": sum(size for _, size, _ in entries),
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Process-wide cache, so counters survive Streamlit reruns."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = RenderCache()
+        return _cache
+
+
+_fragments = None
+
+
+def get_fragment_cache():
+    """Process-wide store of rendered fragments, for processors that re-render only what changed."""
+    global _fragments
+    with _cache_lock:
+        if _fragments is None:
+            _fragments = RenderCache(FRAGMENT_DIR, max_bytes=FRAGMENT_MAX_BYTES)
+        return _fragments
@@ -0,0 +1,191 @@
+import html
+import json
+import re
+import unicodedata
+
+# ---------------------------------------------------------
+# Client-side search: an inverted index (term -> documents) built
+# at render time and embedded in the page, plus a small script that
+# adds a filter box above the accordion. A keystroke is a binary
+# search over the sorted terms and a few set operations; the page
+# text itself is never scanned.
+# ---------------------------------------------------------
+
+INDEX_ID = "searchIndex"
+
+_TAG = re.compile(r"<[^>]*>")
+_TERM = re.compile(r"[^\W_]+")
+
+
+def terms(text):
+    """
+    The distinct search terms in `text`: lower-case runs of letters and
+    digits, accents dropped, markup ignored. SEARCH_SCRIPT splits the
+    query the same way.
+    """
+    text = html.unescape(_TAG.sub(" ", text))
+    text = unicodedata.normalize("NFD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return set(_TERM.findall(text))
+
+
+def _deltas(numbers):
+    # Ascending lists shrink to small gaps: [3, 4, 9] -> [3, 1, 5]
+    previous = 0
+    gaps = []
+    for n in numbers:
+        gaps.append(n - previous)
+        previous = n
+    return gaps
+
+
+def build_index(docs):
+    """
+    Index `docs`, an iterable of (item, row, text): `item` is the 0-based
+    accordion item the text belongs to, `row` its table row in that item's
+    body (None when the whole item is one document).
+
+    Returns {"terms": sorted terms, "postings": per term, the delta-encoded
+    document numbers}, plus "items" (delta-encoded) when documents aren't
+    one per item, and "rows" when any document is a row.
+    """
+    postings = {}
+    items = []
+    rows = []
+    for doc, (item, row, text) in enumerate(docs):
+        items.append(item)
+        rows.append(row)
+        for term in terms(text):
+            postings.setdefault(term, []).append(doc)
+
+    ordered = sorted(postings)
+    index = {"terms": ordered, "postings": [_deltas(postings[term]) for term in ordered]}
+    if items != list(range(len(items))):
+        index["items"] = _deltas(items)
+    if any(row is not None for row in rows):
+        index["rows"] = rows
+    return index
+
+
+SEARCH_SCRIPT = """
+    <script>
+        // Filter box over the embedded index: every query word must start some word of a match
+        (function () {
+            var accordion = document.querySelector(".accordion");
+            var source = document.getElementById("%(index_id)s");
+            if (!accordion || !source) {
+                return;
+            }
+            var index = JSON.parse(source.textContent);
+            var terms = index.terms;
+            var items = accordion.querySelectorAll(":scope > .accordion-item");
+            var decoded = {};
+            var shown = null;
+
+            function undelta(gaps) {
+                var out = [], n = 0;
+                for (var i = 0; i < gaps.length; i++) {
+                    n += gaps[i];
+                    out.push(n);
+                }
+                return out;
+            }
+            var itemOf = index.items ? undelta(index.items) : null;
+
+            function split(text) {
+                return text.normalize("NFD").replace(/\\p{M}/gu, "").toLowerCase().match(/[\\p{L}\\p{N}]+/gu) || [];
+            }
+
+            function lowerBound(word) {
+                var lo = 0, hi = terms.length;
+                while (lo < hi) {
+                    var mid = (lo + hi) >> 1;
+                    if (terms[mid] < word) { lo = mid + 1; } else { hi = mid; }
+                }
+                return lo;
+            }
+
+            function lookup(word) {
+                var docs = new Set();
+                for (var i = lowerBound(word); i < terms.length && terms[i].lastIndexOf(word, 0) === 0; i++) {
+                    decoded[i] = decoded[i] || undelta(index.postings[i]);
+                    decoded[i].forEach(function (doc) { docs.add(doc); });
+                }
+                return docs;
+            }
+
+            function filterRows(item, i) {
+                var rows = item.querySelectorAll("tbody tr");
+                var keep = shown && shown.get(i);
+                for (var r = 0; r < rows.length; r++) {
+                    rows[r].style.display = !keep || keep.has(r) ? "" : "none";
+                }
+            }
+
+            function apply(query) {
+                var docs = null;
+                split(query).forEach(function (word) {
+                    var found = lookup(word);
+                    docs = docs === null ? found : new Set(Array.from(docs).filter(function (d) { return found.has(d); }));
+                });
+
+                shown = null;
+                if (docs !== null) {
+                    shown = new Map();
+                    docs.forEach(function (doc) {
+                        var item = itemOf ? itemOf[doc] : doc;
+                        if (!shown.has(item)) {
+                            shown.set(item, index.rows ? new Set() : null);
+                        }
+                        if (index.rows) {
+                            shown.get(item).add(index.rows[doc]);
+                        }
+                    });
+                }
+
+                var count = 0;
+                for (var i = 0; i < items.length; i++) {
+                    var visible = !shown || shown.has(i);
+                    count += visible ? 1 : 0;
+                    if (items[i].hidden === visible) {
+                        items[i].hidden = !visible;
+                    }
+                    // Rows of collapsed items are filtered when they open
+                    if (index.rows && items[i].querySelector(".collapse.show")) {
+                        filterRows(items[i], i);
+                    }
+                }
+                status.textContent = shown ? count + " of " + items.length + " match" : "";
+            }
+
+            var box = document.createElement("input");
+            box.type = "search";
+            box.className = "form-control mb-1";
+            box.placeholder = "Search";
+            box.setAttribute("aria-label", "Search");
+            var status = document.createElement("div");
+            status.className = "small text-muted mb-1";
+            status.setAttribute("aria-live", "polite");
+            accordion.parentNode.insertBefore(box, accordion);
+            accordion.parentNode.insertBefore(status, accordion);
+
+            box.addEventListener("input", function () { apply(box.value); });
+            if (index.rows) {
+                // After a lazy body is filled in: its listener was added first
+                document.addEventListener("show.bs.collapse", function (event) {
+                    var item = event.target.closest(".accordion-item");
+                    filterRows(item, Array.prototype.indexOf.call(items, item));
+                });
+            }
+        })();
+    </script>
+""" % {"index_id": INDEX_ID}
+
+
+def iter_search(index):
+    """Yield the embedded index and the filter script; goes after the accordion items."""
+    # Terms are letters and digits only, so nothing in the JSON can close the script
+    yield f'\n    <script type="application/json" id="{INDEX_ID}">'
+    yield json.dumps(index, ensure_ascii=False, separators=(",", ":"))
+    yield "</script>\n"
+    yield SEARCH_SCRIPT
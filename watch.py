@@ -0,0 +1,300 @@
+"""
+Watch-folder publisher: keeps a publish directory in step with a folder of workbooks.
+
+    python watch.py shared/chapters -o site/ -s calendar -s presidents
+
+Every poll, the folder is scanned for .xlsx files. A new or changed workbook
+is converted once it has stopped changing for --settle seconds, so a burst
+of saves is one conversion. Its outputs are written under the publish
+directory, mirroring the folder's layout. A deleted workbook's outputs are
+removed.
+
+An index of each workbook's mtime, size and SHA-256 is kept in the publish
+directory (or --index). A workbook whose mtime changed but whose content
+didn't is not converted again, and a restart only converts what changed
+while the watcher was down. --once runs a single pass without waiting and
+exits: 0 when everything published, 1 when any workbook failed.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from functools import partial
+
+from convert import find_workbooks, resolve_scripts
+from utils.file_io import write_atomic
+
+INDEX_NAME = ".pioneer-watch.json"
+
+
+def publish_workbook(path, rel, names, publish_dir, lazy=False, search=False, optimize=False, exports=()):
+    """
+    Worker: convert one workbook and write its outputs under `publish_dir`,
+    in the directory `rel` (its path inside the watched folder) is in.
+    Returns (sha256 of the bytes converted, {processor: written paths,
+    relative to `publish_dir`}, errors).
+    """
+    from processors.batch import convert_source
+
+    with open(path, "rb") as f:
+        data = f.read()
+
+    converted = convert_source(data, os.path.basename(path), names, lazy=lazy, search=search, optimize=optimize,
+                               exports=exports)
+
+    written = {}
+    for output in converted["outputs"]:
+        for file_name, content in output["files"].items():
+            # Same name every time, so a new version replaces the published one
+            target = os.path.join(os.path.dirname(rel), file_name)
+            write_atomic(os.path.join(publish_dir, target), content)
+            written.setdefault(output["processor"], []).append(target)
+
+    return hashlib.sha256(data).hexdigest(), written, converted["errors"]
+
+
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+# ---------------------------------------------------------
+# Index: {"settings": ..., "workbooks": {rel: {"mtime", "size",
+# "sha256", "outputs": {processor: paths}, "errors"}}}, saved
+# after every change
+# ---------------------------------------------------------
+def load_index(path, settings):
+    try:
+        with open(path, encoding="utf-8") as f:
+            index = json.load(f)
+    except FileNotFoundError:
+        index = {}
+    except ValueError:
+        print(f"Index {path} is unreadable; starting a new one", file=sys.stderr)
+        index = {}
+
+    workbooks = index.get("workbooks", {})
+    if index.get("settings") != settings:
+        # Other processors or options: everything is converted again, and its old outputs replaced
+        for entry in workbooks.values():
+            entry["mtime"] = entry["size"] = entry["sha256"] = None
+    return {"settings": settings, "workbooks": workbooks}
+
+
+def save_index(path, index):
+    write_atomic(path, json.dumps(index, indent=1, sort_keys=True))
+
+
+class Watcher:
+    """
+    Polls `folder` and republishes what changed; see the module docstring.
+    `convert(batch)` takes [(path, rel), ...] and yields ((path, rel),
+    result, error) per workbook, result being publish_workbook()'s.
+    """
+
+    def __init__(self, folder, publish_dir, index_path, settings, convert, settle=5.0, log=print):
+        self.folder = folder
+        self.publish_dir = publish_dir
+        self.index_path = index_path
+        self.index = load_index(index_path, settings)
+        self.convert = convert
+        self.settle = settle
+        self.log = log
+        self.pending = {} # rel -> ((mtime, size), when that stat was first seen)
+        self.failed = 0
+
+    @property
+    def workbooks(self):
+        return self.index["workbooks"]
+
+    def scan(self):
+        stats = {}
+        for path in find_workbooks([self.folder]):
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            stats[os.path.relpath(path, self.folder)] = (st.st_mtime, st.st_size)
+        return stats
+
+    def poll(self, now=None):
+        """One pass: drop deleted workbooks, then convert the ones that changed and settled."""
+        now = time.time() if now is None else now
+        stats = self.scan()
+
+        for rel in [rel for rel in self.workbooks if rel not in stats]:
+            for targets in self.workbooks.pop(rel)["outputs"].values():
+                self.remove_outputs(targets)
+            self.pending.pop(rel, None)
+            save_index(self.index_path, self.index)
+            self.log(f"GONE {rel}")
+
+        ready = []
+        for rel, stat in stats.items():
+            entry = self.workbooks.get(rel)
+            if entry is not None and (entry["mtime"], entry["size"]) == tuple(stat):
+                self.pending.pop(rel, None)
+                continue
+            seen = self.pending.get(rel)
+            if seen is None or seen[0] != stat:
+                # New or still changing: wait for it to settle
+                self.pending[rel] = seen = (stat, now)
+            if now - seen[1] >= self.settle:
+                ready.append(rel)
+
+        batch = []
+        for rel in ready:
+            stat = self.pending.pop(rel)[0]
+            entry = self.workbooks.get(rel)
+            path = os.path.join(self.folder, rel)
+            if entry is not None and entry["sha256"] is not None:
+                try:
+                    unchanged = file_hash(path) == entry["sha256"]
+                except FileNotFoundError:
+                    continue
+                if unchanged:
+                    # Touched or re-saved as-is: nothing to publish
+                    entry["mtime"], entry["size"] = stat
+                    save_index(self.index_path, self.index)
+                    continue
+            batch.append((path, rel, stat))
+
+        if batch:
+            stats_by_rel = {rel: stat for _, rel, stat in batch}
+            for (path, rel), result, error in self.convert([(path, rel) for path, rel, _ in batch]):
+                self.record(rel, stats_by_rel[rel], result, error)
+        return len(batch)
+
+    def record(self, rel, stat, result, error):
+        entry = self.workbooks.get(rel) or {"outputs": {}}
+        if error is None:
+            sha, written, errors = result
+        else:
+            # Couldn't be read at all; it's tried again once it changes
+            sha, written, errors = None, {}, {"workbook": f"{type(error).__name__}: {error}"}
+
+        outputs = {}
+        for name, targets in entry["outputs"].items():
+            if name not in written and (name in errors or "workbook" in errors):
+                # A processor that failed this time leaves its last good outputs published
+                outputs[name] = targets
+            else:
+                self.remove_outputs([target for target in targets if target not in written.get(name, ())])
+        outputs.update(written)
+
+        entry.update({"mtime": stat[0], "size": stat[1], "sha256": sha, "outputs": outputs, "errors": errors})
+        self.workbooks[rel] = entry
+        save_index(self.index_path, self.index)
+
+        if errors:
+            self.failed += 1
+            self.log(f"FAIL {rel}")
+            for name, message in errors.items():
+                self.log(f"     {name}: {message}")
+        else:
+            self.log(f"OK   {rel} -> {sum(len(targets) for targets in written.values())} file(s)")
+
+    def remove_outputs(self, targets):
+        for target in targets:
+            try:
+                os.remove(os.path.join(self.publish_dir, target))
+            except FileNotFoundError:
+                pass
+            # Drop directories the removal left empty, up to the publish directory
+            parent = os.path.dirname(target)
+            while parent:
+                try:
+                    os.rmdir(os.path.join(self.publish_dir, parent))
+                except OSError:
+                    break
+                parent = os.path.dirname(parent)
+
+    def run(self, interval=2.0, once=False):
+        if once:
+            self.settle = 0
+            self.poll()
+            return
+        while True:
+            self.poll()
+            time.sleep(interval)
+
+
+def main(argv=None):
+    from processors.records import EXPORTERS
+
+    parser = argparse.ArgumentParser(description="Watch a folder of Excel workbooks and publish their HTML "
+                                                 "whenever they change.")
+    parser.add_argument("folder", help="folder to watch (every .xlsx inside, recursively)")
+    parser.add_argument("-o", "--output-dir", default="publish", help="publish directory (default: publish/)")
+    parser.add_argument("-s", "--script", action="append", dest="scripts",
+                        help="processor to run, by name or slug (repeatable; default: all)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="worker processes (default: one per core)")
+    parser.add_argument("--interval", type=float, default=2.0, help="seconds between scans (default: 2)")
+    parser.add_argument("--settle", type=float, default=5.0,
+                        help="seconds a workbook must go unchanged before it is converted (default: 5)")
+    parser.add_argument("--index", help=f"index file (default: {INDEX_NAME} in the publish directory)")
+    parser.add_argument("--once", action="store_true", help="convert what changed since the last run, then exit")
+    parser.add_argument("--lazy", action="store_true",
+                        help="accordion outputs load each body on first expand (for very large pages)")
+    parser.add_argument("--search", action="store_true",
+                        help="accordion outputs get a search box over an index embedded in the page")
+    parser.add_argument("--optimize", action="store_true",
+                        help="minify the HTML and write .gz/.br precompressed siblings next to it")
+    parser.add_argument("--export", action="append", dest="exports", default=[], choices=sorted(EXPORTERS),
+                        help="also write this format from the same parsed rows, where the processor offers it "
+                             "(repeatable)")
+    parser.add_argument("--log-json", action="store_true",
+                        help="log per-stage timing/memory records as JSON lines on stderr")
+    args = parser.parse_args(argv)
+
+    from processors.registry import SCRIPTS
+
+    try:
+        names = resolve_scripts(args.scripts, SCRIPTS)
+    except ValueError as e:
+        parser.error(str(e))
+    if not os.path.isdir(args.folder):
+        parser.error(f"'{args.folder}' is not a directory")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    index_path = args.index or os.path.join(args.output_dir, INDEX_NAME)
+
+    # Anything that changes the outputs; a different set republishes every workbook
+    settings = {
+        "scripts": {name: SCRIPTS[name]["version"] for name in names},
+        "lazy": args.lazy,
+        "search": args.search,
+        "optimize": args.optimize,
+        "exports": sorted(set(args.exports)),
+    }
+
+    from processors.batch import iter_pool
+
+    publish = partial(publish_workbook, names=names, publish_dir=args.output_dir, lazy=args.lazy,
+                      search=args.search, optimize=args.optimize, exports=args.exports)
+
+    def convert(batch):
+        return iter_pool(publish, batch, names, jobs=args.jobs, log_json=args.log_json)
+
+    def log(line):
+        print(f"{time.strftime('%H:%M:%S')} {line}", flush=True)
+
+    watcher = Watcher(args.folder, args.output_dir, index_path, settings, convert, settle=args.settle, log=log)
+    if not args.once:
+        log(f"Watching {args.folder} -> {args.output_dir} (Ctrl+C to stop)")
+    try:
+        watcher.run(args.interval, once=args.once)
+    except KeyboardInterrupt:
+        pass
+
+    return 1 if watcher.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())